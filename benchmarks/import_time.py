@@ -0,0 +1,60 @@
+'''
+Import-time benchmark for botasaurus_requests.
+
+Imports the package in fresh interpreters and fails if the median import
+time exceeds the budget, or if modules that the request path doesn't need
+are loaded at import.
+
+    python benchmarks/import_time.py [--runs 10] [--budget 0.3]
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# loaded lazily, only by the features that need them
+LAZY_MODULES = ('httpx', 'rich', 'click', 'requests', 'bs4', 'urllib3', 'geventhttpclient')
+
+PROBE = f'''
+import json, sys, time
+start = time.perf_counter()
+import botasaurus_requests
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+'''
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def probe() -> dict:
+    out = subprocess.run(
+        [sys.executable, '-c', PROBE], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='fresh interpreters to time')
+    parser.add_argument('--budget', type=float, default=0.3, help='max median import time (s)')
+    args = parser.parse_args()
+
+    results = [probe() for _ in range(args.runs)]
+    median = statistics.median(r['elapsed'] for r in results)
+    loaded = sorted({m for r in results for m in r['loaded']})
+
+    print(f'import botasaurus_requests: median {median * 1000:.1f} ms over {args.runs} runs')
+    failed = False
+    if loaded:
+        print(f'FAIL: loaded at import: {", ".join(loaded)}')
+        failed = True
+    if median > args.budget:
+        print(f'FAIL: over budget of {args.budget * 1000:.0f} ms')
+        failed = True
+    return int(failed)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+'''
+JSON codec benchmark for bridge payloads and replies.
+
+Times, for each installed codec (json, orjson, msgspec), in fresh interpreters:
+- encoding a /multirequest batch of payloads
+- decoding a bridge reply carrying a large body
+- Response.json on a large document
+
+    python benchmarks/json_codec.py [--size-mb 8] [--batch 100] [--runs 5]
+'''
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROBE = '''
+import json, sys, time
+from botasaurus_requests import framing, json_codec
+from botasaurus_requests.response import Response
+
+size, batch, runs = (int(arg) for arg in sys.argv[1:])
+
+
+def best(func):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+# a /multirequest batch of requests posting json bodies
+body = json.dumps({'items': [{'id': i, 'name': f'item {i}', 'tags': ['a', 'b']} for i in range(200)]})
+payloads = [
+    {
+        'sessionId': '00000000-0000-0000-0000-000000000000',
+        'headers': {'User-Agent': 'Mozilla/5.0', 'Accept': '*/*', 'Accept-Language': 'en-US'},
+        'headerOrder': ['user-agent', 'accept', 'accept-language'],
+        'requestUrl': f'https://example.com/{i}',
+        'requestMethod': 'POST',
+        'requestBody': body,
+        'requestCookies': [],
+        'timeoutMilliseconds': 30000,
+    }
+    for i in range(batch)
+]
+# a reply carrying a large html body, with escapes to decode
+html = ('<div class="row">\\u00e9 "quoted" \\\\ text</div>\\n' * (size * 2 ** 20 // 44))[: size * 2 ** 20]
+reply = json.dumps(
+    {'isHistory': False, 'response': {'status': 200, 'headers': {}, 'body': html, 'isBase64': False}}
+).encode()
+# a large json document
+document = json.dumps(
+    [{'id': i, 'price': i * 0.5, 'title': f'product {i}', 'ok': True} for i in range(size * 2 ** 20 // 60)]
+).encode()
+resp = Response(url='https://example.com', status_code=200, headers={}, cookies=None, raw=document)
+
+print(json.dumps({
+    'codec': json_codec.CODEC,
+    'encode batch': best(lambda: framing.dump(payloads)),
+    'decode reply': best(lambda: framing.decode(reply)),
+    'Response.json': best(resp.json),
+}))
+'''
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CODECS = ('json', 'orjson', 'msgspec')
+
+
+def probe(codec: str, args: argparse.Namespace) -> dict:
+    proc = subprocess.run(
+        [sys.executable, '-c', PROBE, str(args.size_mb), str(args.batch), str(args.runs)],
+        cwd=ROOT,
+        env={**os.environ, 'BOTASAURUS_REQUESTS_JSON': codec},
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode:
+        # codec not installed
+        return {}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=8, help='size of the large body and document')
+    parser.add_argument('--batch', type=int, default=100, help='payloads in the encoded batch')
+    parser.add_argument('--runs', type=int, default=5, help='repetitions, the best is kept')
+    args = parser.parse_args()
+
+    results = [result for result in (probe(codec, args) for codec in CODECS) if result]
+    baseline = results[0]
+    cases = [key for key in baseline if key != 'codec']
+    print(f"{'codec':<10}" + ''.join(f'{case:>24}' for case in cases))
+    for result in results:
+        cells = (
+            f'{result[case] * 1000:9.1f} ms ({baseline[case] / result[case]:4.1f}x)' for case in cases
+        )
+        print(f"{result['codec']:<10}" + ''.join(f'{cell:>24}' for cell in cells))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
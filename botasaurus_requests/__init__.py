@@ -23,9 +23,24 @@ def detect_module() -> bool:
 #     os.environ['BOTASAURUS_REQUESTS_MODULE'] = '1'
 
 
+from .bridge import configure_bridge, prewarm
+from .backends import set_backend
 from .response import Response, ProcessResponse
-from .session import Session, TLSSession, chrome, firefox
+from .session import PreparedRequest, Session, TLSSession, chrome, firefox, session_pool
 from .reqs import *   
 from  . import request_functions as request
 from .headers import Headers
-from .request_class import Request
+
+
+def __getattr__(name: str):
+    # `Request` subclasses requests.Session, import it only when used
+    if name == 'Request':
+        from .request_class import Request
+
+        return Request
+    # asyncio API, imported only when used
+    if name == 'AsyncSession':
+        from .async_session import AsyncSession
+
+        return AsyncSession
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
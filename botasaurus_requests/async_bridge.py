@@ -0,0 +1,214 @@
+import asyncio
+import weakref
+from typing import Dict, Iterable, List, Optional, Tuple, Type, Union
+
+from . import bridge
+from .bridge import BridgeConfig, socket_path
+from .cffi import get_library
+
+'''
+asyncio transports to the Go bridge, used by AsyncSession.
+
+They mirror the gevent transports of bridge.py without needing a gevent hub:
+- post(endpoint, body) -> bytes (awaitable)
+- close() (awaitable)
+
+Transports are shared by every AsyncSession running on the same event loop (see get_async_transport).
+'''
+
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class AsyncHTTPTransport:
+    '''
+    Sends payloads to the local Go server over TCP loopback, with asyncio streams
+    '''
+
+    def __init__(self, config: BridgeConfig) -> None:
+        self.config: BridgeConfig = config
+        # limits the connections to the bridge
+        self.semaphore: asyncio.Semaphore = asyncio.Semaphore(config.concurrency)
+        # idle keep-alive connections
+        self.idle: List[Connection] = []
+
+    def launch(self) -> None:
+        # start the local TCP server (blocking, run in an executor)
+        self.port: int = bridge.launch_server()
+
+    async def open_connection(self) -> Connection:
+        return await asyncio.open_connection('127.0.0.1', self.port)
+
+    async def post(self, endpoint: str, body: Union[str, bytes, Iterable[bytes]]) -> bytes:
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        async with self.semaphore:
+            if self.idle:
+                conn = self.idle.pop()
+                try:
+                    return await self._post(conn, endpoint, body)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # the idle keep-alive connection went stale, retry on a fresh one
+                    pass
+            conn = await asyncio.wait_for(self.open_connection(), self.config.connection_timeout)
+            return await self._post(conn, endpoint, body)
+
+    async def _post(
+        self, conn: Connection, endpoint: str, body: Union[bytes, Iterable[bytes]]
+    ) -> bytes:
+        reader, writer = conn
+        try:
+            reply, keep_alive = await asyncio.wait_for(
+                self.exchange(reader, writer, endpoint, body), self.config.network_timeout
+            )
+        except BaseException:
+            writer.close()
+            raise
+        if keep_alive:
+            self.idle.append(conn)
+        else:
+            writer.close()
+        return reply
+
+    @staticmethod
+    async def exchange(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        endpoint: str,
+        body: Union[bytes, Iterable[bytes]],
+    ) -> Tuple[bytes, bool]:
+        # POST a payload and read the reply (HTTP/1.1, as served by the bridge)
+        writer.write(
+            f'POST {endpoint} HTTP/1.1\r\nHost: localhost\r\n'
+            f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1')
+        )
+        if isinstance(body, bytes):
+            writer.write(body)
+        else:
+            # send the chunks as they are produced
+            for chunk in body:
+                writer.write(chunk)
+                await writer.drain()
+        await writer.drain()
+
+        status_line: bytes = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError('Bridge closed the connection')
+        headers: Dict[str, str] = {}
+        while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive: bool = headers.get('connection', '').lower() != 'close'
+        if 'content-length' in headers:
+            return await reader.readexactly(int(headers['content-length'])), keep_alive
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks: List[bytes] = []
+            while size := int((await reader.readline()).split(b';')[0], 16):
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            # skip the trailers
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            return b''.join(chunks), keep_alive
+        # delimited by the end of the connection
+        return await reader.read(), False
+
+    async def close(self) -> None:
+        while self.idle:
+            self.idle.pop()[1].close()
+
+
+class AsyncUnixTransport(AsyncHTTPTransport):
+    '''
+    Sends payloads to the Go server over a unix domain socket, with asyncio streams
+    '''
+
+    def launch(self) -> None:
+        self.socket_path: str = get_library().launch_unix(socket_path())
+
+    async def open_connection(self) -> Connection:
+        # the server may still be binding right after launch
+        for delay in (0.01, 0.05, 0.1, 0.5, None):
+            try:
+                return await asyncio.open_unix_connection(self.socket_path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+
+class AsyncCgoTransport:
+    '''
+    Calls the exported Request function of the loaded library in the loop's default executor
+    '''
+
+    def __init__(self, config: BridgeConfig) -> None:
+        self.config: BridgeConfig = config
+
+    def launch(self) -> None:
+        self.library = get_library()
+        if not self.library.has_request:
+            raise OSError('The cgo transport requires a hrequests-cgo build that exports Request.')
+
+    async def post(self, endpoint: str, body: Union[str, bytes, Iterable[bytes]]) -> bytes:
+        if not isinstance(body, (str, bytes)):
+            # the in-process call takes the whole payload at once
+            body = b''.join(body)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.library.request, endpoint, body)
+
+    async def close(self) -> None:
+        pass
+
+
+async_transports: Dict[str, Type] = {
+    'http': AsyncHTTPTransport,
+    'unix': AsyncUnixTransport,
+    'cgo': AsyncCgoTransport,
+}
+
+
+# shared transports of each event loop (asyncio streams can't be shared across loops)
+_transports: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]]' = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def _create_transport(name: str):
+    try:
+        transport_cls = async_transports[name]
+    except KeyError as e:
+        raise ValueError(f'`{name}` is not a valid transport: {tuple(async_transports)}') from e
+    transport = transport_cls(bridge.config)
+    # loading the library and starting the server blocks, keep the loop running meanwhile
+    await asyncio.get_running_loop().run_in_executor(None, transport.launch)
+    return transport
+
+
+async def get_async_transport(name: Optional[str] = None):
+    '''
+    Return the transport of the running event loop by name (http, unix, cgo), creating it on first use.
+    Defaults to the BOTASAURUS_REQUESTS_TRANSPORT environment variable, or http.
+    '''
+    name = name or bridge.DEFAULT_TRANSPORT
+    loop = asyncio.get_running_loop()
+    transports = _transports.setdefault(loop, {})
+    if name not in transports:
+        # concurrent callers wait for the same transport
+        transports[name] = loop.create_task(_create_transport(name))
+    try:
+        return await asyncio.shield(transports[name])
+    except Exception:
+        # retry on next use
+        if transports.get(name) is not None and transports[name].done():
+            del transports[name]
+        raise
+
+
+async def close_async_transports() -> None:
+    '''
+    Close the transports of the running event loop
+    '''
+    for task in _transports.pop(asyncio.get_running_loop(), {}).values():
+        if task.done() and not task.cancelled() and task.exception() is None:
+            await task.result().close()
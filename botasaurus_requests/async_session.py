@@ -0,0 +1,185 @@
+import asyncio
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Union
+from urllib.parse import urlencode
+
+from .cookies import RequestsCookieJar
+from .reqs import FailedResponse
+from .response import ProcessResponse, Response
+from .session import Session
+from .toolbelt import CaseInsensitiveDict
+
+'''
+asyncio API: AsyncSession, and async versions of map, imap and as_completed.
+
+Example:
+    async with AsyncSession() as session:
+        resp = await session.get('https://example.com')
+        resps = await map([session.get(url) for url in urls], size=10)
+'''
+
+
+class AsyncSession(Session):
+    '''
+    Session whose requests are coroutines, sent to the bridge with asyncio.
+    Accepts the same parameters as Session.
+
+    Methods:
+        request(method, url, ...): Send a request (awaitable)
+        get, post, options, head, put, patch, delete: Shortcuts for request (awaitable)
+        close(): Close the session
+    '''
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # async network methods
+        self.get: partial = partial(self.request, 'GET', allow_redirects=True)
+        self.post: partial = partial(self.request, 'POST', allow_redirects=True)
+        self.options: partial = partial(self.request, 'OPTIONS', allow_redirects=False)
+        self.head: partial = partial(self.request, 'HEAD', allow_redirects=True)
+        self.put: partial = partial(self.request, 'PUT', allow_redirects=True)
+        self.patch: partial = partial(self.request, 'PATCH', allow_redirects=True)
+        self.delete: partial = partial(self.request, 'DELETE', allow_redirects=False)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: Optional[dict] = None,
+        data: Optional[Union[str, bytes, bytearray, dict]] = None,
+        files: Optional[dict] = None,
+        headers: Optional[Union[dict, CaseInsensitiveDict]] = None,
+        cookies: Optional[Union[RequestsCookieJar, dict, list]] = None,
+        json: Optional[Union[dict, list, str]] = None,
+        allow_redirects: bool = True,
+        history: bool = False,
+        verify: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        proxy: Optional[str] = None,
+        proxies: Optional[dict] = None,  # backwards compatibility
+    ) -> Response:
+        '''
+        Send a request with TLS client.
+        Accepts the same parameters as TLSSession.request (except stream), and `params`.
+
+        Returns:
+            response.Response: Response object
+        '''
+        if params is not None:
+            url = f'{url}?{urlencode(params, doseq=True)}'
+        # unpack proxy
+        if proxies and not proxy:
+            proxy = self.unpack_proxy(proxies)
+        proc = ProcessResponse(
+            session=self,
+            method=method,
+            url=url,
+            data=data,
+            files=files,
+            headers=headers,
+            cookies=cookies,
+            json=json,
+            allow_redirects=allow_redirects,
+            history=history,
+            verify=self.verify if verify is None else verify,
+            timeout=self.timeout if timeout is None else timeout,
+            proxy=proxy,
+        )
+        await proc.asend()
+        return proc.response
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+
+def _fail(
+    request: Awaitable, e: Exception, exception_handler: Optional[Callable]
+) -> FailedResponse:
+    # record a request's failure
+    if exception_handler:
+        exception_handler(request, e)
+    return FailedResponse(e)
+
+
+async def imap(
+    requests: Iterable[Awaitable[Response]],
+    size: Optional[int] = 2,
+    enumerate: bool = False,
+    exception_handler: Optional[Callable] = None,
+) -> AsyncIterator:
+    '''
+    Concurrently awaits requests (e.g. session.get(url)), yielding Responses as they complete.
+
+    Parameters:
+        requests - a collection of awaitable requests.
+        size - Specifies the number of requests to make at a time. If None, no throttling occurs. default is 2
+        enumerate - Yield (index, Response) tuples instead of Responses.
+        exception_handler - Callback function, called when exception occurred. Params: Request, Exception
+
+    Yields:
+        Response objects (FailedResponse for failed requests), in arbitrary order.
+    '''
+    requests = list(requests)
+    if not requests:
+        return
+    semaphore: asyncio.Semaphore = asyncio.Semaphore(size or len(requests))
+    done: asyncio.Queue = asyncio.Queue()
+
+    async def send(index: int, request: Awaitable[Response]) -> None:
+        async with semaphore:
+            try:
+                result = await request
+            except Exception as e:
+                result = e
+        done.put_nowait((index, result))
+
+    tasks: List[asyncio.Task] = [
+        asyncio.ensure_future(send(index, requests[index])) for index in range(len(requests))
+    ]
+    try:
+        for _ in range(len(tasks)):
+            index, result = await done.get()
+            if isinstance(result, Exception):
+                result = _fail(requests[index], result, exception_handler)
+            yield (index, result) if enumerate else result
+    finally:
+        # stop requests still in flight if the consumer stopped early
+        for task in tasks:
+            task.cancel()
+
+
+def as_completed(
+    requests: Iterable[Awaitable[Response]],
+    exception_handler: Optional[Callable] = None,
+) -> AsyncIterator:
+    '''
+    Concurrently awaits all requests, yielding Responses as they complete.
+    '''
+    return imap(requests, size=None, exception_handler=exception_handler)
+
+
+async def map(
+    requests: Iterable[Awaitable[Response]],
+    size: Optional[int] = None,
+    exception_handler: Optional[Callable] = None,
+) -> List[Union[Response, FailedResponse]]:
+    '''
+    Concurrently awaits requests (e.g. session.get(url)).
+
+    Parameters:
+        requests - a collection of awaitable requests.
+        size - Specifies the number of requests to make at a time. If None, no throttling occurs.
+        exception_handler - Callback function, called when exception occurred. Params: Request, Exception
+
+    Returns:
+        A list of Response objects, in the order of the requests.
+    '''
+    requests = list(requests)
+    resps: list = [None] * len(requests)
+    async for index, resp in imap(requests, size, True, exception_handler):
+        resps[index] = resp
+    return resps
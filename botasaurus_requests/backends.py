@@ -0,0 +1,166 @@
+import os
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed as futures_as_completed
+from typing import Dict, Iterable, Iterator, List, Optional, Type
+
+from .bridge import ensure_concurrency
+
+'''
+Concurrency backends used by map, imap and imap_enum to send requests.
+
+Every backend exposes the same interface:
+- imap(requests, size, ordered) -> iterator of sent requests.
+  Keeps `size` requests in flight (None: all of them), in input order if `ordered`,
+  else in completion order. Requests don't raise: their response or exception
+  is recorded on them. BridgeConfig.concurrency is raised to `size` if needed,
+  so the bridge connections don't throttle the requests.
+
+Backends:
+- gevent: greenlets on a gevent pool (default)
+- threads: a thread pool, with thread-safe bridge transports.
+  CPU-heavy callbacks run in parallel with networking on free-threaded builds
+- asyncio: an event loop in the calling thread, with the asyncio bridge transports
+
+Select per call (map(..., backend='threads')), or globally with set_backend
+or the BOTASAURUS_REQUESTS_BACKEND environment variable.
+'''
+
+DEFAULT_BACKEND: str = os.getenv('BOTASAURUS_REQUESTS_BACKEND', 'gevent')
+
+
+def send_request(request):
+    # send a request, recording the exception instead of raising it
+    request.response = None
+    try:
+        request.send()
+    except Exception as e:
+        request.exception = e
+        request.traceback = traceback.format_exc()
+    return request
+
+
+async def asend_request(request):
+    # like send_request, on the running event loop
+    request.response = None
+    try:
+        await request.asend()
+    except Exception as e:
+        request.exception = e
+        request.traceback = traceback.format_exc()
+    return request
+
+
+class GeventBackend:
+    '''
+    Sends requests from greenlets on a gevent pool
+    '''
+
+    @staticmethod
+    def imap(requests: Iterable, size: Optional[int], ordered: bool) -> Iterator:
+        from gevent.pool import Pool
+
+        if size:
+            # the bridge transports must keep up with the pool
+            ensure_concurrency(size)
+        pool = Pool(size)
+        try:
+            yield from (pool.imap if ordered else pool.imap_unordered)(send_request, requests)
+        finally:
+            # stop requests still in flight if the consumer stopped early
+            pool.kill()
+
+
+class ThreadBackend:
+    '''
+    Sends requests from a thread pool
+    '''
+
+    @staticmethod
+    def imap(requests: Iterable, size: Optional[int], ordered: bool) -> Iterator:
+        requests = list(requests)
+        if not requests:
+            return
+        executor = ThreadPoolExecutor(
+            size or len(requests), thread_name_prefix='botasaurus-requests'
+        )
+        try:
+            futures: list = [executor.submit(send_request, request) for request in requests]
+            for future in futures if ordered else futures_as_completed(futures):
+                yield future.result()
+        finally:
+            # drop queued requests if the consumer stopped early
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+class AsyncioBackend:
+    '''
+    Sends requests on an event loop run in the calling thread
+    '''
+
+    @staticmethod
+    def imap(requests: Iterable, size: Optional[int], ordered: bool) -> Iterator:
+        import asyncio
+
+        from .async_bridge import close_async_transports
+
+        requests = list(requests)
+        if not requests:
+            return
+        size = size or len(requests)
+        # the bridge transports (created on this loop) must keep up with the semaphore
+        ensure_concurrency(size)
+        loop = asyncio.new_event_loop()
+        semaphore = asyncio.Semaphore(size)
+
+        async def asend(request):
+            async with semaphore:
+                return await asend_request(request)
+
+        tasks: List[asyncio.Task] = [loop.create_task(asend(request)) for request in requests]
+        try:
+            if ordered:
+                for task in tasks:
+                    yield loop.run_until_complete(task)
+            else:
+                pending: set = set(tasks)
+                while pending:
+                    done, pending = loop.run_until_complete(
+                        asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    )
+                    for task in done:
+                        yield task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(close_async_transports())
+            loop.close()
+
+
+backends: Dict[str, Type] = {
+    'gevent': GeventBackend,
+    'threads': ThreadBackend,
+    'asyncio': AsyncioBackend,
+}
+
+
+def get_backend(name: Optional[str] = None):
+    '''
+    Return a backend by name (gevent, threads, asyncio).
+    Defaults to the one set with set_backend, or $BOTASAURUS_REQUESTS_BACKEND, or gevent.
+    '''
+    name = name or DEFAULT_BACKEND
+    try:
+        return backends[name]
+    except KeyError as e:
+        raise ValueError(f'`{name}` is not a valid backend: {tuple(backends)}') from e
+
+
+def set_backend(name: str) -> None:
+    '''
+    Set the default backend of map, imap and imap_enum
+    '''
+    global DEFAULT_BACKEND
+    get_backend(name)
+    DEFAULT_BACKEND = name
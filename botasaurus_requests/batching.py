@@ -0,0 +1,101 @@
+from typing import Dict, List, Optional, Tuple
+
+import gevent
+from gevent.event import AsyncResult
+
+from . import bridge, framing
+from .exceptions import ClientException
+
+'''
+Micro-batching of single requests.
+
+Requests issued concurrently (e.g. by hundreds of greenlets calling session.get)
+are collected for up to BridgeConfig.batch_window seconds, or until batch_size
+of them are waiting, and sent together in one /multirequest call.
+Each caller gets back its own reply, as if it had posted to /request.
+
+Enable with BOTASAURUS_REQUESTS_BATCH_WINDOW, or configure_bridge(batch_window=...).
+'''
+
+
+class Coalescer:
+    '''
+    Collects /request payloads sent through one transport into /multirequest batches
+    '''
+
+    def __init__(self, transport: Optional[str] = None) -> None:
+        self.transport: Optional[str] = transport
+        # payloads waiting for the next batch, with their caller's result
+        self.pending: List[Tuple[dict, AsyncResult]] = []
+        self.timer: Optional[gevent.Greenlet] = None
+
+    def submit(self, payload: dict) -> dict:
+        '''
+        Queue a /request payload and wait for its reply
+        '''
+        result: AsyncResult = AsyncResult()
+        self.pending.append((payload, result))
+        if len(self.pending) >= bridge.config.batch_size:
+            self.flush()
+        elif self.timer is None:
+            self.timer = gevent.spawn_later(bridge.config.batch_window, self.flush)
+        return result.get()
+
+    def flush(self) -> None:
+        '''
+        Send the pending payloads now
+        '''
+        if self.timer is not None:
+            # don't kill the timer from within itself
+            if self.timer is not gevent.getcurrent():
+                self.timer.kill(block=False)
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            # send from its own greenlet, so the caller that filled the batch isn't held up
+            gevent.spawn(self.send, batch)
+
+    def send(self, batch: List[Tuple[dict, AsyncResult]]) -> None:
+        error: BaseException = ClientException('The batch was not sent to the bridge')
+        try:
+            transport = bridge.get_transport(self.transport)
+            if len(batch) == 1:
+                # nothing to batch with
+                reply = transport.post('/request', framing.dump(batch[0][0]))
+                replies: list = [framing.decode(reply)]
+            else:
+                payloads: list = [payload for payload, _ in batch]
+                replies = framing.decode(transport.post('/multirequest', framing.dump(payloads)))
+                if not isinstance(replies, list) or len(replies) != len(batch):
+                    raise ClientException(
+                        f'Unexpected /multirequest reply for {len(batch)} requests: '
+                        f'{str(replies)[:200]}'
+                    )
+            # route each reply back to its caller
+            for (_, result), reply in zip(batch, replies):
+                result.set(reply)
+        except BaseException as e:
+            error = e
+            if not isinstance(e, Exception):
+                # e.g. GreenletExit, after the callers are failed
+                raise
+        finally:
+            # no caller is left waiting
+            for _, result in batch:
+                if not result.ready():
+                    result.set_exception(error)
+
+
+# coalescers by transport name
+_coalescers: Dict[Optional[str], Coalescer] = {}
+
+
+def get_coalescer(transport: Optional[str] = None) -> Coalescer:
+    if transport not in _coalescers:
+        _coalescers[transport] = Coalescer(transport)
+    return _coalescers[transport]
+
+
+def enabled() -> bool:
+    # batches are collected by greenlets, plain threads send their requests directly
+    return bridge.config.batch_window > 0 and bridge.in_hub_thread()
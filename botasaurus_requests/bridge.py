@@ -0,0 +1,482 @@
+import os
+import socket as std_socket
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, fields
+from http.client import HTTPConnection, HTTPException, HTTPResponse
+from io import BytesIO
+from typing import Dict, Iterable, List, Optional, Tuple, Type, Union
+
+from gevent import sleep, socket
+from gevent.monkey import is_module_patched
+from gevent.queue import LifoQueue
+from gevent.threadpool import ThreadPool
+
+from .cffi import get_library
+
+'''
+Transports used by TLSClient to reach the Go bridge.
+
+Transports are shared by every session of the process (see get_transport),
+and pool their connections according to BridgeConfig.
+Plain OS threads get a ThreadTransport instead, as gevent transports
+can only be used from the thread running their hub.
+
+Every transport exposes the same interface:
+- post(endpoint, body) -> bytes: send a payload to a bridge endpoint and return the raw reply.
+  `body` is str, bytes, or a sized iterable of bytes (framing.Envelope) that is streamed
+- open(endpoint, body) -> file-like: like post, but the reply is read incrementally
+- close(): release the resources held by the transport
+'''
+
+DEFAULT_TRANSPORT: str = os.getenv('BOTASAURUS_REQUESTS_TRANSPORT', 'http')
+
+
+def socket_path() -> str:
+    '''
+    Path of the unix socket of this process's bridge, worked out when it launches
+    (one socket per process, so workers on the same box never race for a port):
+    $BOTASAURUS_REQUESTS_SOCKET, where "{pid}" is replaced by the process id,
+    else botasaurus-requests-<pid>.sock in the temporary directory.
+    '''
+    path: Optional[str] = os.getenv('BOTASAURUS_REQUESTS_SOCKET')
+    if path:
+        return path.replace('{pid}', str(os.getpid()))
+    return os.path.join(tempfile.gettempdir(), f'botasaurus-requests-{os.getpid()}.sock')
+
+
+@dataclass
+class BridgeConfig:
+    '''
+    Limits of the process-wide bridge transports.
+    Defaults can be set with environment variables, and changed with configure_bridge.
+    '''
+
+    # max connections to the bridge (shared by all sessions)
+    concurrency: int = int(os.getenv('BOTASAURUS_REQUESTS_CONCURRENCY', 64))
+    # seconds to wait for a connection to the bridge
+    connection_timeout: float = float(os.getenv('BOTASAURUS_REQUESTS_CONNECTION_TIMEOUT', 10))
+    # seconds to wait for a bridge reply (request timeouts are enforced by the bridge itself)
+    network_timeout: float = float(os.getenv('BOTASAURUS_REQUESTS_NETWORK_TIMEOUT', 1e9))
+    # seconds to collect concurrent requests into one /multirequest call (0 disables batching)
+    batch_window: float = float(os.getenv('BOTASAURUS_REQUESTS_BATCH_WINDOW', 0))
+    # max requests per batch
+    batch_size: int = int(os.getenv('BOTASAURUS_REQUESTS_BATCH_SIZE', 64))
+
+
+config: BridgeConfig = BridgeConfig()
+
+
+def launch_server() -> int:
+    # start the local TCP server on first use, and return its port
+    library = get_library()
+    library.launch()
+    return library.PORT
+
+
+class HTTPTransport:
+    '''
+    Sends payloads to the local Go server over TCP loopback
+    '''
+
+    def __init__(self, config: BridgeConfig) -> None:
+        from geventhttpclient import HTTPClient
+
+        self.config: BridgeConfig = config
+        self.port: int = launch_server()
+        # http client for local go server
+        self.client: HTTPClient = HTTPClient(
+            '127.0.0.1',
+            self.port,
+            ssl=False,
+            insecure=True,
+            concurrency=config.concurrency,
+            connection_timeout=config.connection_timeout,
+            network_timeout=config.network_timeout,
+        )
+
+    def connection(self) -> 'TCPHTTPConnection':
+        return TCPHTTPConnection(
+            '127.0.0.1',
+            self.port,
+            timeout=self.config.network_timeout,
+            connection_timeout=self.config.connection_timeout,
+        )
+
+    def post(self, endpoint: str, body: Union[str, bytes, Iterable[bytes]]) -> bytes:
+        if isinstance(body, (str, bytes)):
+            return self.client.post(endpoint, body=body).read()
+        # streamed uploads get their own connection
+        conn = self.connection()
+        try:
+            return send(conn, endpoint, body).read()
+        finally:
+            conn.close()
+
+    def open(self, endpoint: str, body: Union[str, bytes, Iterable[bytes]]) -> 'StreamReply':
+        # streams get their own connection, so they don't hold up the session's requests
+        return StreamReply.open(self.connection(), endpoint, body)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def send(
+    conn: HTTPConnection, endpoint: str, body: Union[str, bytes, Iterable[bytes]]
+) -> HTTPResponse:
+    # POST a payload over an http.client connection
+    headers: dict = {}
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    elif not isinstance(body, bytes):
+        # send the chunks as they are produced
+        headers['Content-Length'] = str(len(body))
+        body = iter(body)
+    conn.request('POST', endpoint, body=body, headers=headers)
+    return conn.getresponse()
+
+
+class StreamReply:
+    '''
+    Reply read incrementally from a dedicated connection, closed along with it
+    '''
+
+    def __init__(self, conn: HTTPConnection, resp: HTTPResponse) -> None:
+        self.conn: HTTPConnection = conn
+        self.resp: HTTPResponse = resp
+
+    @classmethod
+    def open(
+        cls, conn: HTTPConnection, endpoint: str, body: Union[str, bytes, Iterable[bytes]]
+    ) -> 'StreamReply':
+        try:
+            return cls(conn, send(conn, endpoint, body))
+        except BaseException:
+            conn.close()
+            raise
+
+    def read(self, size: int = -1) -> bytes:
+        return self.resp.read() if size < 0 else self.resp.read(size)
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class TCPHTTPConnection(HTTPConnection):
+    '''
+    HTTPConnection over a gevent cooperative TCP socket
+    '''
+
+    socket_module = socket
+
+    def __init__(self, host: str, port: int, timeout: float, connection_timeout: float) -> None:
+        super().__init__(host, port, timeout=timeout)
+        self.connection_timeout: float = connection_timeout
+
+    def connect(self) -> None:
+        self.sock = self.socket_module.create_connection(
+            (self.host, self.port), self.connection_timeout
+        )
+        self.sock.settimeout(self.timeout)
+
+
+class UnixHTTPConnection(HTTPConnection):
+    '''
+    HTTPConnection over a (gevent cooperative) unix domain socket
+    '''
+
+    socket_module = socket
+    sleep = staticmethod(sleep)
+
+    def __init__(self, socket_path: str, timeout: float, connection_timeout: float) -> None:
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path: str = socket_path
+        self.connection_timeout: float = connection_timeout
+
+    def connect(self) -> None:
+        module = self.socket_module
+        sock = module.socket(module.AF_UNIX, module.SOCK_STREAM)
+        sock.settimeout(self.connection_timeout)
+        # the server may still be binding right after launch
+        for delay in (0.01, 0.05, 0.1, 0.5, None):
+            try:
+                sock.connect(self.socket_path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if delay is None:
+                    sock.close()
+                    raise
+                self.sleep(delay)
+        sock.settimeout(self.timeout)
+        self.sock = sock
+
+
+class UnixTransport:
+    '''
+    Sends payloads to the Go server over a unix domain socket
+    '''
+
+    def __init__(self, config: BridgeConfig) -> None:
+        self.socket_path: str = get_library().launch_unix(socket_path())
+        self.config: BridgeConfig = config
+        # idle keep-alive connections (None until first used)
+        self.pool: LifoQueue = LifoQueue(config.concurrency)
+        for _ in range(config.concurrency):
+            self.pool.put(None)
+
+    def connection(self) -> UnixHTTPConnection:
+        return UnixHTTPConnection(
+            self.socket_path,
+            timeout=self.config.network_timeout,
+            connection_timeout=self.config.connection_timeout,
+        )
+
+    def post(self, endpoint: str, body: Union[str, bytes, Iterable[bytes]]) -> bytes:
+        conn = self.pool.get()
+        try:
+            if conn is not None:
+                try:
+                    return self._post(conn, endpoint, body)
+                except (HTTPException, ConnectionError):
+                    # the idle keep-alive connection went stale, retry on a fresh one
+                    conn.close()
+            conn = self.connection()
+            return self._post(conn, endpoint, body)
+        except BaseException:
+            conn.close()
+            conn = None
+            raise
+        finally:
+            self.pool.put(conn)
+
+    @staticmethod
+    def _post(
+        conn: UnixHTTPConnection, endpoint: str, body: Union[str, bytes, Iterable[bytes]]
+    ) -> bytes:
+        return send(conn, endpoint, body).read()
+
+    def open(self, endpoint: str, body: Union[str, bytes, Iterable[bytes]]) -> StreamReply:
+        return StreamReply.open(self.connection(), endpoint, body)
+
+    def close(self) -> None:
+        while not self.pool.empty():
+            conn = self.pool.get()
+            conn and conn.close()
+
+
+def supports_stream() -> bool:
+    # whether the loaded bridge serves /stream and /multistream (older builds only serve /request)
+    return get_library().has_stream
+
+
+def require_request(library):
+    # the in-process transport needs the exported Request function
+    if not library.has_request:
+        raise OSError('The cgo transport requires a hrequests-cgo build that exports Request.')
+    return library
+
+
+class CgoTransport:
+    '''
+    Calls the exported Request function of the loaded library directly,
+    skipping the TCP loopback and HTTP framing.
+    '''
+
+    def __init__(self, config: BridgeConfig) -> None:
+        self.library = require_request(get_library())
+        # concurrent calls are limited by config.concurrency (not by the hub threadpool size)
+        self.pool: ThreadPool = ThreadPool(config.concurrency)
+
+    def post(self, endpoint: str, body: Union[str, bytes, Iterable[bytes]]) -> bytes:
+        if not isinstance(body, (str, bytes)):
+            # the in-process call takes the whole payload at once
+            body = b''.join(body)
+        # run the blocking call in the transport's threadpool so other greenlets keep running
+        # while Go works (the GIL is released by ctypes during the call)
+        return self.pool.apply(self.library.request, (endpoint, body))
+
+    def open(self, endpoint: str, body: Union[str, bytes, Iterable[bytes]]) -> BytesIO:
+        # the in-process call can't stream, the reply is buffered
+        return BytesIO(self.post(endpoint, body))
+
+    def close(self) -> None:
+        self.pool.kill()
+
+
+class ThreadTCPHTTPConnection(TCPHTTPConnection):
+    # blocking socket, for plain threads
+    socket_module = std_socket
+
+
+class ThreadUnixHTTPConnection(UnixHTTPConnection):
+    # blocking socket, for plain threads
+    socket_module = std_socket
+    sleep = staticmethod(time.sleep)
+
+
+class ThreadTransport:
+    '''
+    Thread-safe transport for plain OS threads (thread pools, lazy requests, free-threaded builds).
+    Each thread keeps its own keep-alive connection to the bridge, on blocking sockets
+    that release the GIL while waiting.
+    '''
+
+    def __init__(self, name: str, config: BridgeConfig) -> None:
+        self.name: str = name
+        self.config: BridgeConfig = config
+        self.local: threading.local = threading.local()
+        # every connection opened, to close them from any thread
+        self.connections: List[HTTPConnection] = []
+        self.lock: threading.Lock = threading.Lock()
+        library = get_library()
+        if name == 'cgo':
+            self.library = require_request(library)
+        elif name == 'unix':
+            self.socket_path: str = library.launch_unix(socket_path())
+        else:
+            self.port: int = launch_server()
+
+    def connection(self) -> HTTPConnection:
+        if self.name == 'unix':
+            return ThreadUnixHTTPConnection(
+                self.socket_path,
+                timeout=self.config.network_timeout,
+                connection_timeout=self.config.connection_timeout,
+            )
+        return ThreadTCPHTTPConnection(
+            '127.0.0.1',
+            self.port,
+            timeout=self.config.network_timeout,
+            connection_timeout=self.config.connection_timeout,
+        )
+
+    def thread_connection(self) -> Tuple[HTTPConnection, bool]:
+        # the connection of this thread, and whether it was already used
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            return conn, True
+        conn = self.local.conn = self.connection()
+        with self.lock:
+            self.connections.append(conn)
+        return conn, False
+
+    def drop(self, conn: HTTPConnection) -> None:
+        conn.close()
+        self.local.conn = None
+        with self.lock:
+            if conn in self.connections:
+                self.connections.remove(conn)
+
+    def post(self, endpoint: str, body: Union[str, bytes, Iterable[bytes]]) -> bytes:
+        if self.name == 'cgo':
+            if not isinstance(body, (str, bytes)):
+                body = b''.join(body)
+            # the GIL is released by ctypes during the call
+            return self.library.request(endpoint, body)
+        conn, reused = self.thread_connection()
+        try:
+            return send(conn, endpoint, body).read()
+        except (HTTPException, ConnectionError):
+            self.drop(conn)
+            if not reused:
+                raise
+        # the idle keep-alive connection went stale, retry on a fresh one
+        conn, _ = self.thread_connection()
+        try:
+            return send(conn, endpoint, body).read()
+        except BaseException:
+            self.drop(conn)
+            raise
+
+    def open(self, endpoint: str, body: Union[str, bytes, Iterable[bytes]]):
+        if self.name == 'cgo':
+            # the in-process call can't stream, the reply is buffered
+            return BytesIO(self.post(endpoint, body))
+        return StreamReply.open(self.connection(), endpoint, body)
+
+    def close(self) -> None:
+        with self.lock:
+            connections, self.connections = self.connections, []
+        for conn in connections:
+            conn.close()
+
+
+transports: Dict[str, Type] = {
+    'http': HTTPTransport,
+    'unix': UnixTransport,
+    'cgo': CgoTransport,
+}
+
+
+# shared transports of this process, by name and thread kind
+_transports: Dict[Tuple[str, bool], object] = {}
+_transports_pid: int = os.getpid()
+_transports_lock: threading.Lock = threading.Lock()
+
+
+def in_hub_thread() -> bool:
+    # gevent transports work in the main thread, or anywhere once threading is monkey-patched
+    return threading.current_thread() is threading.main_thread() or is_module_patched('threading')
+
+
+def get_transport(name: Optional[str] = None):
+    '''
+    Return the process-wide transport by name (http, unix, cgo), creating it on first use.
+    Defaults to the BOTASAURUS_REQUESTS_TRANSPORT environment variable, or http.
+    Other threads than the main one get a thread-safe transport (see ThreadTransport).
+    '''
+    global _transports_pid
+    name = name or DEFAULT_TRANSPORT
+    key: Tuple[str, bool] = (name, in_hub_thread())
+    with _transports_lock:
+        if _transports_pid != os.getpid():
+            # connections inherited from a parent process can't be shared,
+            # new transports launch this process's own bridge (see socket_path)
+            _transports.clear()
+            _transports_pid = os.getpid()
+        if key not in _transports:
+            try:
+                transport_cls = transports[name]
+            except KeyError as e:
+                raise ValueError(f'`{name}` is not a valid transport: {tuple(transports)}') from e
+            _transports[key] = transport_cls(config) if key[1] else ThreadTransport(name, config)
+        return _transports[key]
+
+
+def configure_bridge(**kwargs) -> None:
+    '''
+    Change the limits of the bridge transports (see BridgeConfig).
+    Open transports are closed, and recreated with the new limits on next use.
+
+    Example:
+        configure_bridge(concurrency=256, network_timeout=120)
+    '''
+    names = {field.name for field in fields(BridgeConfig)}
+    if unknown := set(kwargs) - names:
+        raise TypeError(f'Unknown bridge settings: {unknown}')
+    for key, value in kwargs.items():
+        setattr(config, key, value)
+    with _transports_lock:
+        while _transports:
+            _transports.popitem()[1].close()
+
+
+def ensure_concurrency(concurrency: int) -> None:
+    '''
+    Raise config.concurrency to at least `concurrency` (e.g. for map(size=...)).
+    Open transports are replaced on next use; requests in flight on them finish undisturbed,
+    and their connections are released along with them.
+    '''
+    if concurrency <= config.concurrency:
+        return
+    with _transports_lock:
+        config.concurrency = concurrency
+        _transports.clear()
+
+
+def prewarm(transport: Optional[str] = None) -> None:
+    '''
+    Load the library and start the bridge now, instead of on the first request.
+    '''
+    get_transport(transport)
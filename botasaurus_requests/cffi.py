@@ -1,12 +1,13 @@
 import ctypes
 import os
+import socket
+import stat
+import threading
 from pathlib import Path
 from platform import machine
 from sys import platform
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union
 
-
-from httpx import get, stream
 from json import loads
 
 from .__version__ import BRIDGE_VERSION
@@ -95,6 +96,8 @@ class LibraryManager:
                 return asset['browser_download_url'], asset['name']
 
     def get_releases(self) -> dict:
+        from httpx import get
+
         resp = get('https://api.github.com/repos/daijro/hrequests/releases')
         if resp.status_code != 200:
             raise ConnectionError(f'Could not connect to GitHub: {resp.text}')
@@ -133,6 +136,8 @@ class LibraryManager:
         # file downloader with progress bar
         total: int
         import rich.progress
+        from httpx import stream
+
         with stream('GET', url, follow_redirects=True) as resp:
             total = int(resp.headers['Content-Length'])
             with rich.progress.Progress(
@@ -146,10 +151,22 @@ class LibraryManager:
                     fstream.write(chunk)
                     progress.update(download_task, completed=resp.num_bytes_downloaded)
 
+    @staticmethod
+    def resolve_path() -> str:
+        '''
+        Resolve the library path, downloading it if needed.
+        The result is cached in $BOTASAURUS_REQUESTS_LIBRARY, so child processes skip the lookup.
+        '''
+        path: Optional[str] = os.getenv('BOTASAURUS_REQUESTS_LIBRARY')
+        if path and os.path.isfile(path):
+            return path
+        path = LibraryManager().full_path
+        os.environ['BOTASAURUS_REQUESTS_LIBRARY'] = path
+        return path
+
     @staticmethod
     def load_library() -> ctypes.CDLL:
-        libman: LibraryManager = LibraryManager()
-        return ctypes.cdll.LoadLibrary(libman.full_path)
+        return ctypes.cdll.LoadLibrary(LibraryManager.resolve_path())
 
 
 class GoString(ctypes.Structure):
@@ -157,16 +174,19 @@ class GoString(ctypes.Structure):
     _fields_ = [("p", ctypes.c_char_p), ("n", ctypes.c_longlong)]
 
 
-def gostring(s: str) -> GoString:
-    # create a string buffer and keep a reference to it
-    port_buf = ctypes.create_string_buffer(s.encode('utf-8'))
-    # pass the buffer to GoString
-    go_str = GoString(ctypes.cast(port_buf, ctypes.c_char_p), len(s))
-    # attach the buffer to the GoString instance to keep it alive
-    go_str._keep_alive = port_buf
+def gostring(s: Union[str, bytes]) -> GoString:
+    # point the GoString at the encoded bytes directly (no intermediate copy)
+    data: bytes = s.encode('utf-8') if isinstance(s, str) else bytes(s)
+    go_str = GoString(ctypes.c_char_p(data), len(data))
+    # attach the bytes to the GoString instance to keep them alive
+    go_str._keep_alive = data
     return go_str
 
 
+# serializes the launch of the bridge servers (see Library.launch and Library.launch_unix)
+_launch_lock: threading.Lock = threading.Lock()
+
+
 class Library:
     def __init__(self) -> None:
         # load the shared package
@@ -179,23 +199,91 @@ class Library:
         self.library.GetOpenPort.argtypes = []
         self.library.GetOpenPort.restype = ctypes.c_int
 
-    def launch(self) -> None:
-        # spawn the server
-        self.PORT = self.get_open_port()
-        if not self.PORT:
-            raise OSError('Could not find an open port.')
+        # extract the exposed Request and FreeMemory functions (in-process transport)
+        self.has_request: bool = self._bind_request()
 
-        # extract the exposed StartServer and StopServer functions
-        self.library.StartServer.argtypes = [GoString]
-        self.library.StopServer.argtypes = []
+        # builds of the bridge that serve /stream and /multistream export SupportsStream
+        self.has_stream: bool = hasattr(self.library, 'SupportsStream')
 
-        self.start_server()
+    def _bind_request(self) -> bool:
+        # older builds of the bridge only expose the local server
+        try:
+            request, free_memory = self.library.Request, self.library.FreeMemory
+        except AttributeError:
+            return False
+        request.argtypes = [GoString, GoString, ctypes.POINTER(ctypes.c_longlong)]
+        request.restype = ctypes.c_void_p
+        free_memory.argtypes = [ctypes.c_void_p]
+        free_memory.restype = None
+        return True
+
+    def launch(self) -> None:
+        # spawn the server, once per process
+        # (transports of several threads or event loops may launch at once)
+        with _launch_lock:
+            if getattr(self, 'PORT', None):
+                return
+            port: int = self.get_open_port()
+            if not port:
+                raise OSError('Could not find an open port.')
+
+            # extract the exposed StartServer and StopServer functions
+            self.library.StartServer.argtypes = [GoString]
+            self.library.StopServer.argtypes = []
+
+            self.PORT = port
+            try:
+                self.start_server()
+            except BaseException:
+                self.PORT = None
+                raise
+
+    def launch_unix(self, socket_path: str) -> str:
+        '''
+        Spawn the server on a unix domain socket, once per process, and return its path.
+        If `socket_path` is served by another process (e.g. the parent of a forked worker),
+        the server listens on `<socket_path>.<pid>` instead.
+        '''
+        if getattr(self, 'SOCKET_PATH', None) and self.socket_pid == os.getpid():
+            return self.SOCKET_PATH
+        with _launch_lock:
+            if getattr(self, 'SOCKET_PATH', None) and self.socket_pid == os.getpid():
+                return self.SOCKET_PATH
+            try:
+                self.library.StartUnixServer.argtypes = [GoString]
+            except AttributeError as e:
+                raise OSError(
+                    'The loaded hrequests-cgo library does not export StartUnixServer.'
+                ) from e
+            if not claim_socket(socket_path):
+                socket_path = f'{socket_path}.{os.getpid()}'
+                if not claim_socket(socket_path):
+                    raise OSError(f'{socket_path} is in use by another process.')
+            self.library.StartUnixServer(gostring(socket_path))
+            self.socket_pid: int = os.getpid()
+            self.SOCKET_PATH = socket_path
+            return socket_path
 
     def destroy_session(self, session_id: str):
         # destroy a session by its passed session_id
         ref: GoString = gostring(session_id)
         self.library.DestroySession(ref)
 
+    def request(self, endpoint: str, payload: Union[str, bytes]) -> bytes:
+        '''
+        Call an endpoint of the bridge in-process, without the local server.
+        ctypes releases the GIL for the duration of the call.
+        '''
+        if not self.has_request:
+            raise OSError('The loaded hrequests-cgo library does not export Request.')
+        size = ctypes.c_longlong()
+        ptr = self.library.Request(gostring(endpoint), gostring(payload), ctypes.byref(size))
+        try:
+            return ctypes.string_at(ptr, size.value)
+        finally:
+            # the reply buffer is allocated by Go's C.malloc
+            self.library.FreeMemory(ptr)
+
     def get_open_port(self) -> int:
         # generate a new open port
         return self.library.GetOpenPort()
@@ -210,10 +298,60 @@ class Library:
         self.library.StopServer()
 
 
-library: Optional[Library]
-
-if os.getenv('BOTASAURUS_REQUESTS_MODULE'):
-    library = None
-else:
-    library = Library()
-    library.launch()
+def claim_socket(socket_path: str) -> bool:
+    '''
+    Whether a server can listen on `socket_path`.
+    A stale socket left behind by a dead process (nothing accepts connections) is removed,
+    a live one is left alone.
+    '''
+    try:
+        mode: int = os.stat(socket_path).st_mode
+    except FileNotFoundError:
+        return True
+    if not stat.S_ISSOCK(mode):
+        raise OSError(f'{socket_path} exists and is not a socket.')
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(1)
+    try:
+        sock.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        # the server that owned it is gone
+        try:
+            os.remove(socket_path)
+        except FileNotFoundError:
+            pass
+        return True
+    except OSError:
+        # e.g. a full backlog: someone is serving it
+        return False
+    finally:
+        sock.close()
+    return False
+
+
+_library: Optional[Library] = None
+_library_lock: threading.Lock = threading.Lock()
+
+
+def get_library() -> Library:
+    '''
+    Load the library on first use.
+    The bridge server itself is launched by the transport that needs it.
+    '''
+    global _library
+    if _library is None:
+        with _library_lock:
+            if _library is None:
+                _library = Library()
+    return _library
+
+
+def is_loaded() -> bool:
+    return _library is not None
+
+
+def __getattr__(name: str):
+    # backwards compatibility: `cffi.library` loads the library on access
+    if name == 'library':
+        return get_library()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -1,25 +1,25 @@
 import re
 import uuid
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Set, Union
-from urllib.parse import urlencode
+from io import BytesIO
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple, Union
+from urllib.parse import urlencode, urlparse
 
-from geventhttpclient import HTTPClient
-from json import dumps, loads
-
-from .cffi import library
-from . import response
+from .bridge import get_transport, supports_stream
+from . import batching, cffi, framing, response
+from .json_codec import dumps
 
 from .cookies import (
     RequestsCookieJar,
     cookiejar_from_dict,
+    changes_to_list,
     cookiejar_to_list,
-    extract_cookies_to_jar,
+    extract_response_cookies,
     list_to_cookiejar,
     merge_cookies,
 )
 from .exceptions import ClientException, ProxyFormatException
-from .toolbelt import CaseInsensitiveDict
+from .toolbelt import CaseInsensitiveDict, MultipartEncoder
 
 try:
     import turbob64 as base64
@@ -37,6 +37,37 @@ PROXY_PATTERN: re.Pattern = re.compile(
 )
 
 
+# TLSClient attributes encoded in the session-static fields of request payloads
+STATIC_ATTRIBUTES: FrozenSet[str] = frozenset(
+    {
+        '_session_id',
+        'headers',
+        'client_identifier',
+        'random_tls_extension_order',
+        'force_http1',
+        'catch_panics',
+        'debug',
+        'certificate_pinning',
+        'disable_ipv6',
+        'detect_encoding',
+        'ja3_string',
+        'h2_settings',
+        'h2_settings_order',
+        'supported_signature_algorithms',
+        'supported_delegated_credentials_algorithms',
+        'supported_versions',
+        'key_share_curves',
+        'cert_compression_algo',
+        'additional_decode',
+        'pseudo_header_order',
+        'connection_flow',
+        'priority_frames',
+        'header_order',
+        'header_priority',
+    }
+)
+
+
 def verify_proxy(proxy: str) -> None:
     # verify that the proxy is valid with regex
     if not PROXY_PATTERN.match(proxy):
@@ -92,6 +123,11 @@ class TLSClient:
     # backwards compatibility
     proxies: Optional[Dict[str, str]] = None
 
+    # bridge options (after the original fields, so positional arguments keep their meaning)
+    transport: Optional[str] = None  # bridge transport: http, unix, cgo
+    server_cookies: bool = False  # keep the cookie jar in the bridge, sync only changes
+    history_bodies: bool = True  # keep the bodies of redirect responses in history
+
     '''
     Synopsis:
     
@@ -264,8 +300,38 @@ class TLSClient:
     self.proxy usage:
     - "http://user:pass@ip:port",
     - "http://user:pass@ip:port"
+
+    Transport
+    How requests reach the Go bridge. Defaults to $BOTASAURUS_REQUESTS_TRANSPORT, or "http".
+    self.transport examples:
+    - "http" > POST to the local server over TCP loopback
+    - "unix" > POST to the local server over a unix domain socket ($BOTASAURUS_REQUESTS_SOCKET)
+    - "cgo" > call the library's exported Request function in-process
+
+    Server cookies
+    self.server_cookies = True keeps the authoritative cookie jar in the bridge's session.
+    Requests only send the cookies changed in self.cookies since the last request to a matching
+    host, instead of the whole jar. Response cookies are added to self.cookies when it's next used.
+
+    History bodies
+    With history=True, the redirect responses leading to a response are kept in its history.
+    They are only built into Response objects when history is accessed.
+    self.history_bodies = False drops their bodies as soon as they are received.
+
+    Static payload
+    The payload fields that only depend on the session (TLS profile, flags, and self.headers
+    when a request doesn't add its own) are built and JSON encoded once, and reused until one
+    of the attributes above is set or self.headers changes.
+    Changing a profile attribute in place (e.g. self.h2_settings['MAX_FRAME_SIZE'] = ...)
+    isn't noticed: assign it again, or call reset_static_payload().
     '''
 
+    def __setattr__(self, name: str, value) -> None:
+        if name in STATIC_ATTRIBUTES:
+            # encoded again with the next request
+            self.__dict__['_static_payloads'] = {}
+        object.__setattr__(self, name, value)
+
     def __post_init__(self) -> None:
         self._session_id: str = str(uuid.uuid4())
 
@@ -275,24 +341,121 @@ class TLSClient:
             self.proxy = self.unpack_proxy(self.proxies)
             del self.proxies
 
-        # http client for local go server
-        self.server: HTTPClient = HTTPClient(
-            '127.0.0.1',
-            library.PORT,
-            ssl=False,
-            insecure=True,
-            connection_timeout=1e9,
-            network_timeout=1e9,
-        )
         # CookieJar containing all currently outstanding cookies set on this session
         self.cookies: RequestsCookieJar = self.cookies or RequestsCookieJar()
+        if self.server_cookies:
+            # the first request sends the whole jar, the next ones what changed
+            self.cookies.track_changes()
         self._closed: bool = False  # indicate if session is closed
+        # cookies to delete from the bridge's jar with the next request
+        self._expired_cookies: list = []
+        # the bridge's jar may hold cookies of redirects followed without history
+        self._redirect_cookies: bool = False
+
+    def reset_static_payload(self) -> None:
+        '''
+        Drop the cached static payload fields, e.g. after changing a profile attribute in place
+        '''
+        self._static_payloads = {}
+
+    def static_payload(self, with_headers: bool = False) -> Tuple[dict, bytes]:
+        '''
+        Return the session-static fields of request payloads, and their JSON encoding
+        (without the enclosing braces). With with_headers, they include self.headers.
+        Built once, until a profile attribute is set or self.headers changes.
+        '''
+        version: Optional[int] = self.headers._version if with_headers else None
+        cached: Optional[tuple] = self._static_payloads.get(with_headers)
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+
+        fields: dict = {
+            'sessionId': self._session_id,
+            'forceHttp1': self.force_http1,
+            'withDebug': self.debug,
+            'catchPanics': self.catch_panics,
+            'headerOrder': self.header_order,
+            'detectEncoding': self.detect_encoding,
+            'additionalDecode': self.additional_decode,
+            'withoutCookieJar': False,
+            'disableIPv6': self.disable_ipv6,
+        }
+        if with_headers:
+            fields['headers'] = self.headers.to_dict()
+        if self.certificate_pinning:
+            fields['certificatePinning'] = self.certificate_pinning
+        if self.client_identifier is None:
+            fields['customTlsClient'] = {
+                'ja3String': self.ja3_string,
+                'h2Settings': self.h2_settings,
+                'h2SettingsOrder': self.h2_settings_order,
+                'pseudoHeaderOrder': self.pseudo_header_order,
+                'connectionFlow': self.connection_flow,
+                'priorityFrames': self.priority_frames,
+                'headerPriority': self.header_priority,
+                'certCompressionAlgo': self.cert_compression_algo,
+                'supportedVersions': self.supported_versions,
+                'supportedSignatureAlgorithms': self.supported_signature_algorithms,
+                'supportedDelegatedCredentialsAlgorithms': self.supported_delegated_credentials_algorithms,
+                'keyShareCurves': self.key_share_curves,
+            }
+        else:
+            fields['tlsClientIdentifier'] = self.client_identifier
+            fields['withRandomTLSExtensionOrder'] = self.random_tls_extension_order
+        encoded: bytes = dumps(fields)[1:-1]
+        self._static_payloads[with_headers] = (version, fields, encoded)
+        return fields, encoded
+
+    @property
+    def server(self):
+        # transport to the go bridge, shared by the process and opened on first use
+        return get_transport(self.transport)
+
+    def request_cookies(self, url: str) -> list:
+        # cookies sent to the bridge's jar with a request
+        if self.server_cookies:
+            # changes to apply to the bridge's jar (which only accepts the request host's cookies)
+            host: str = (urlparse(url).hostname or '').lower()
+            cookies: list = changes_to_list(self.cookies.pop_changes(host))
+        else:
+            cookies = cookiejar_to_list(self.cookies)
+        if self._expired_cookies:
+            cookies += self._expired_cookies
+            self._expired_cookies = []
+        return cookies
+
+    def expire_cookies(self) -> None:
+        '''
+        Clear the session's cookies.
+        The bridge's jar is cleared with the next request, for cookies matching its host.
+        '''
+        # cookies expired in the past are deleted from the jar
+        self._expired_cookies += [
+            {**cookie, 'expires': 1} for cookie in cookiejar_to_list(self.cookies)
+        ]
+        self.cookies.clear()
+
+    def renew_session(self) -> None:
+        '''
+        Replace the bridge session with a new one, dropping its cookies (including those
+        set by redirects, that self.cookies never saw) and its connections.
+        '''
+        if cffi.is_loaded():
+            cffi.get_library().destroy_session(self._session_id)
+        self._session_id = str(uuid.uuid4())
+        self.cookies.clear()
+        if self.server_cookies:
+            # the new bridge jar is empty
+            self.cookies.track_changes()
+        self._expired_cookies = []
+        self._redirect_cookies = False
 
     def close(self):
         if not self._closed:
             self._closed = True
-            library.destroy_session(self._session_id)
-            self.server.close()
+            # nothing to destroy if the bridge was never used
+            if cffi.is_loaded():
+                cffi.get_library().destroy_session(self._session_id)
 
     def __enter__(self):
         return self
@@ -324,6 +487,7 @@ class TLSClient:
         verify: Optional[bool] = None,
         timeout: Optional[float] = None,
         proxy: Optional[Union[str, dict]] = None,
+        prepared: Optional['session.PreparedRequest'] = None,
     ):
         # Prepare request body - build request body
         # Data has priority. JSON is only used if data is None.
@@ -332,6 +496,10 @@ class TLSClient:
                 json = dumps(json).decode('utf-8')
             request_body = json
             content_type = 'application/json'
+        elif isinstance(data, MultipartEncoder):
+            # streamed while it is sent (base64 encoded unless binary framing is enabled)
+            request_body = data
+            content_type = None
         elif data is not None and type(data) not in (str, bytes):
             request_body = urlencode(data, doseq=True)
             content_type = 'application/x-www-form-urlencoded'
@@ -343,20 +511,19 @@ class TLSClient:
             self.headers['Content-Type'] = content_type
 
         # Prepare Headers
-        if self.headers is None:
+        if prepared is not None:
+            # merged when prepared
+            headers = None
+        elif self.headers is None:
             headers = CaseInsensitiveDict(headers)
         elif headers is None:
             headers = self.headers
         else:
-            merged_headers = CaseInsensitiveDict(self.headers)
-            merged_headers.update(headers)
-
-            # Remove items, where the key or value is set to None.
-            none_keys = [k for (k, v) in merged_headers.items() if v is None or k is None]
-            for key in none_keys:
-                del merged_headers[key]
-
-            headers = merged_headers
+            # layered over the session headers, copied only if changed
+            session_headers = self.headers
+            if not isinstance(session_headers, CaseInsensitiveDict):
+                session_headers = CaseInsensitiveDict(session_headers)
+            headers = session_headers.merge(headers)
 
         if isinstance(cookies, dict):
             # addcookies(self.headers, cookies)
@@ -375,73 +542,76 @@ class TLSClient:
         if proxy:
             verify_proxy(proxy)
 
+        # session-static fields, encoded once
+        if prepared is not None:
+            headers, fields, static_json = prepared.static_payload()
+        else:
+            fields, static_json = self.static_payload(
+                with_headers=headers is self.headers and isinstance(headers, CaseInsensitiveDict)
+            )
+
         # Request
-        is_byte_request = isinstance(request_body, (bytes, bytearray))
-        request_payload = {
-            'sessionId': self._session_id,
-            'followRedirects': allow_redirects,
-            'wantHistory': history,
-            'forceHttp1': self.force_http1,
-            'withDebug': self.debug,
-            'catchPanics': self.catch_panics,
-            'headers': dict(headers) if isinstance(headers, CaseInsensitiveDict) else headers,
-            'headerOrder': self.header_order,
-            'insecureSkipVerify': not verify,
-            'isByteRequest': is_byte_request,
-            'detectEncoding': self.detect_encoding,
-            'additionalDecode': self.additional_decode,
-            'proxyUrl': proxy,
-            'requestUrl': url,
-            'requestMethod': method,
-            'requestBody': (
-                base64.b64encode(request_body).decode() if is_byte_request else request_body
-            ),
-            'requestCookies': cookiejar_to_list(self.cookies),
-            'timeoutMilliseconds': int(timeout * 1000),
-            'withoutCookieJar': False,
-            'disableIPv6': self.disable_ipv6,
-        }
-        if self.certificate_pinning:
-            request_payload['certificatePinning'] = self.certificate_pinning
-        if self.client_identifier is None:
-            request_payload['customTlsClient'] = {
-                'ja3String': self.ja3_string,
-                'h2Settings': self.h2_settings,
-                'h2SettingsOrder': self.h2_settings_order,
-                'pseudoHeaderOrder': self.pseudo_header_order,
-                'connectionFlow': self.connection_flow,
-                'priorityFrames': self.priority_frames,
-                'headerPriority': self.header_priority,
-                'certCompressionAlgo': self.cert_compression_algo,
-                'supportedVersions': self.supported_versions,
-                'supportedSignatureAlgorithms': self.supported_signature_algorithms,
-                'supportedDelegatedCredentialsAlgorithms': self.supported_delegated_credentials_algorithms,
-                'keyShareCurves': self.key_share_curves,
+        is_byte_request = isinstance(request_body, (bytes, bytearray, MultipartEncoder))
+        request_payload = framing.PreparedPayload(fields, static_json)
+        request_payload.update(
+            {
+                'followRedirects': allow_redirects,
+                'wantHistory': history,
+                'insecureSkipVerify': not verify,
+                'isByteRequest': is_byte_request,
+                'proxyUrl': proxy,
+                'requestUrl': url,
+                'requestMethod': method,
+                'requestBody': (
+                    # binary framing sends the body as raw bytes, multipart bodies are encoded when sent
+                    base64.b64encode(request_body).decode()
+                    if isinstance(request_body, (bytes, bytearray)) and not framing.ENABLED
+                    else request_body
+                ),
+                'requestCookies': self.request_cookies(url),
+                'timeoutMilliseconds': int(timeout * 1000),
             }
-        else:
-            request_payload['tlsClientIdentifier'] = self.client_identifier
-            request_payload['withRandomTLSExtensionOrder'] = self.random_tls_extension_order
+        )
+        if 'headers' not in fields:
+            request_payload['headers'] = (
+                headers.to_dict() if isinstance(headers, CaseInsensitiveDict) else headers
+            )
+        if request_payload['followRedirects'] and not request_payload['wantHistory']:
+            # cookies set by the redirects stay in the bridge's jar, unseen by self.cookies
+            self._redirect_cookies = True
 
         return request_payload, headers
 
-    def build_response_obj(
+    def response_cookies(
         self,
         url: str,
         headers: Optional[Union[dict, CaseInsensitiveDict]],
         response_object: dict,
-        proxy: str,
-    ):
+    ) -> RequestsCookieJar:
+        # check a response from the bridge, and set its cookies
         if response_object['status'] == 0:
             raise ClientException(response_object['body'])
-        # Set response cookies
-        response_cookie_jar = extract_cookies_to_jar(
+        return extract_response_cookies(
             request_url=url,
             request_headers=headers,
-            cookie_jar=self.cookies,
             response_headers=response_object['headers'],
+            cookie_jar=self.cookies,
+            # in server_cookies mode they're in the bridge's jar already, merged when self.cookies is next used
+            defer=self.server_cookies,
         )
+
+    def build_response_obj(
+        self,
+        url: str,
+        headers: Optional[Union[dict, CaseInsensitiveDict]],
+        response_object: dict,
+        proxy: str,
+        hops: Optional[list] = None,
+    ):
+        # Set response cookies
+        response_cookie_jar = self.response_cookies(url, headers, response_object)
         # build response class
-        return response.build_response(response_object, response_cookie_jar, proxy)
+        return response.build_response(response_object, response_cookie_jar, proxy, hops)
 
     def build_response(
         self,
@@ -450,10 +620,11 @@ class TLSClient:
         response_object: dict,
         proxy: str,
     ):  # sourcery skip: assign-if-exp
-        history: list = []
         if not response_object['isHistory']:
             return self.build_response_obj(url, headers, response_object['response'], proxy)
         resps: list = response_object['history']
+        # redirect responses, as (reply, cookies) pairs: built if the history is accessed
+        hops: list = []
         for index, item in enumerate(resps):
             if index:  # > 0
                 # get the location redirect url from the previous response
@@ -461,11 +632,28 @@ class TLSClient:
             else:
                 # use the original url
                 item_url = url
-            history.append(self.build_response_obj(item_url, headers, item, proxy))
-        # assign history to last response
-        resp = history[-1]
-        resp.history = history[:-1]
-        return resp
+            if index == len(resps) - 1:
+                break
+            # their cookies are set now, in order
+            cookies: RequestsCookieJar = self.response_cookies(item_url, headers, item)
+            if not self.history_bodies:
+                item['body'] = ''
+            hops.append((item, cookies))
+        # the last response holds the history
+        return self.build_response_obj(item_url, headers, resps[-1], proxy, hops)
+
+    def encode_payload(self, payload: Union[dict, list]) -> Union[bytes, framing.Envelope]:
+        # encode a payload for the bridge
+        return framing.dump(payload)
+
+    def send_payload(self, endpoint: str, payload: Union[dict, list]) -> Union[dict, list]:
+        '''
+        send a payload to a bridge endpoint and return the decoded reply
+        '''
+        if endpoint == '/request' and batching.enabled():
+            # sent along with concurrent requests in one /multirequest call
+            return batching.get_coalescer(self.transport).submit(payload)
+        return framing.decode(self.server.post(endpoint, self.encode_payload(payload)))
 
     def execute_request(
         self,
@@ -473,6 +661,7 @@ class TLSClient:
         url: str,
         headers: Optional[Union[dict, CaseInsensitiveDict]] = None,
         *args,
+        stream: bool = False,
         **kwargs,
     ):
         '''
@@ -480,13 +669,75 @@ class TLSClient:
         '''
         # build request payload
         request_payload, headers = self.build_request(method, url, headers, *args, **kwargs)
+        if stream:
+            return self.execute_stream(url, headers, request_payload)
         try:
             # send request
-            resp = self.server.post(
-                f'http://127.0.0.1:{library.PORT}/request', body=dumps(request_payload)
-            )
-            response_object = loads(resp.read())
+            response_object = self.send_payload('/request', request_payload)
+        except Exception as e:
+            raise ClientException('Request failed') from e
+        # build response class
+        return self.build_response(url, headers, response_object, request_payload['proxyUrl'])
+
+    async def execute_request_async(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Union[dict, CaseInsensitiveDict]] = None,
+        *args,
+        **kwargs,
+    ):
+        '''
+        execute a single request on the running asyncio event loop
+        '''
+        from .async_bridge import get_async_transport
+
+        # build request payload
+        request_payload, headers = self.build_request(method, url, headers, *args, **kwargs)
+        try:
+            # send request
+            server = await get_async_transport(self.transport)
+            reply: bytes = await server.post('/request', self.encode_payload(request_payload))
+            response_object = framing.decode(reply)
         except Exception as e:
             raise ClientException('Request failed') from e
         # build response class
         return self.build_response(url, headers, response_object, request_payload['proxyUrl'])
+
+    def execute_stream(
+        self,
+        url: str,
+        headers: Optional[Union[dict, CaseInsensitiveDict]],
+        request_payload: dict,
+    ):
+        '''
+        execute a single request, leaving the response body to be read incrementally.
+        Bridges without /stream send the whole body, which is then read from memory.
+        '''
+        if not supports_stream():
+            try:
+                response_object = self.send_payload('/request', request_payload)
+            except Exception as e:
+                raise ClientException('Request failed') from e
+            resp = self.build_response(url, headers, response_object, request_payload['proxyUrl'])
+            resp.raw = response.StreamBody(BytesIO(resp.content))
+            return resp
+        try:
+            fp = self.server.open('/stream', self.encode_payload(request_payload))
+        except Exception as e:
+            raise ClientException('Request failed') from e
+        try:
+            response_object, streamed = framing.read_head(fp)
+            resp = self.build_response(url, headers, response_object, request_payload['proxyUrl'])
+        except ClientException:
+            fp.close()
+            raise
+        except Exception as e:
+            fp.close()
+            raise ClientException('Request failed') from e
+        if not streamed:
+            # the body was already sent within the reply
+            fp.close()
+            return resp
+        resp.raw = response.StreamBody(fp)
+        return resp
@@ -1,8 +1,20 @@
 import copy
+import heapq
 import threading
+import time
+from sys import intern
 from http.client import HTTPMessage
-from http.cookiejar import Cookie, CookieJar
-from typing import Any, MutableMapping, Union
+from http.cookiejar import (
+    Cookie,
+    CookieJar,
+    eff_request_host,
+    escape_path,
+    http2time,
+    request_path,
+    request_port,
+    strip_quotes,
+)
+from typing import Any, Dict, Iterable, List, MutableMapping, Optional, Tuple, Union
 from urllib.parse import urlparse, urlunparse
 
 import botasaurus_requests
@@ -100,6 +112,172 @@ class CookieConflictError(RuntimeError):
     """
 
 
+# shared nonstandard attribute tuples of CompactCookies (most cookies only use a few, like HttpOnly)
+_rest_items: Dict[tuple, tuple] = {}
+
+
+def _intern_rest(rest: Optional[dict]) -> tuple:
+    items: tuple = tuple(rest.items()) if rest else ()
+    try:
+        if len(_rest_items) < 1024:
+            return _rest_items.setdefault(items, items)
+        return _rest_items.get(items, items)
+    except TypeError:
+        # unhashable attribute values
+        return items
+
+
+class CompactCookie:
+    """
+    A memory-compact http.cookiejar.Cookie, as stored by RequestsCookieJar.
+
+    Exposes the same attributes and methods as Cookie, but is slotted, interns its
+    name, domain and path strings (shared by every jar holding cookies of a site),
+    and keeps its nonstandard attributes in a shared tuple instead of a dict.
+    """
+
+    __slots__ = (
+        'version',
+        'name',
+        'value',
+        'port',
+        'port_specified',
+        'domain',
+        'domain_specified',
+        'domain_initial_dot',
+        'path',
+        'path_specified',
+        'secure',
+        'expires',
+        'discard',
+        'comment',
+        'comment_url',
+        'rfc2109',
+        '_rest_items',
+    )
+
+    def __init__(
+        self,
+        version,
+        name,
+        value,
+        port,
+        port_specified,
+        domain,
+        domain_specified,
+        domain_initial_dot,
+        path,
+        path_specified,
+        secure,
+        expires,
+        discard,
+        comment,
+        comment_url,
+        rest,
+        rfc2109=False,
+    ):
+        if version is not None:
+            version = int(version)
+        if expires is not None:
+            expires = int(float(expires))
+        if port is None and port_specified is True:
+            raise ValueError("if port is None, port_specified must be false")
+
+        self.version = version
+        self.name = intern(name) if isinstance(name, str) else name
+        self.value = value
+        self.port = port
+        self.port_specified = port_specified
+        self.domain = intern(domain) if isinstance(domain, str) else domain
+        self.domain_specified = domain_specified
+        self.domain_initial_dot = domain_initial_dot
+        self.path = intern(path) if isinstance(path, str) else path
+        self.path_specified = path_specified
+        self.secure = secure
+        self.expires = expires
+        self.discard = discard
+        self.comment = comment
+        self.comment_url = comment_url
+        self.rfc2109 = rfc2109
+        self._rest_items = _intern_rest(rest)
+
+    @property
+    def _rest(self) -> dict:
+        # a copy, change attributes with set_nonstandard_attr
+        return dict(self._rest_items)
+
+    def has_nonstandard_attr(self, name: str) -> bool:
+        return any(key == name for key, _ in self._rest_items)
+
+    def get_nonstandard_attr(self, name: str, default=None):
+        for key, value in self._rest_items:
+            if key == name:
+                return value
+        return default
+
+    def set_nonstandard_attr(self, name: str, value) -> None:
+        rest: dict = dict(self._rest_items)
+        rest[name] = value
+        self._rest_items = _intern_rest(rest)
+
+    def is_expired(self, now=None) -> bool:
+        if now is None:
+            now = time.time()
+        return self.expires is not None and self.expires <= now
+
+    def __reduce__(self):
+        return (
+            CompactCookie,
+            (
+                self.version,
+                self.name,
+                self.value,
+                self.port,
+                self.port_specified,
+                self.domain,
+                self.domain_specified,
+                self.domain_initial_dot,
+                self.path,
+                self.path_specified,
+                self.secure,
+                self.expires,
+                self.discard,
+                self.comment,
+                self.comment_url,
+                self._rest,
+                self.rfc2109,
+            ),
+        )
+
+    __str__ = Cookie.__str__
+    __repr__ = Cookie.__repr__
+
+
+def compact_cookie(cookie) -> CompactCookie:
+    """Convert a Cookie to a CompactCookie (CompactCookies are returned as is)."""
+    if isinstance(cookie, CompactCookie):
+        return cookie
+    return CompactCookie(
+        cookie.version,
+        cookie.name,
+        cookie.value,
+        cookie.port,
+        cookie.port_specified,
+        cookie.domain,
+        cookie.domain_specified,
+        cookie.domain_initial_dot,
+        cookie.path,
+        cookie.path_specified,
+        cookie.secure,
+        cookie.expires,
+        cookie.discard,
+        cookie.comment,
+        cookie.comment_url,
+        getattr(cookie, '_rest', None),
+        cookie.rfc2109,
+    )
+
+
 class RequestsCookieJar(CookieJar, MutableMapping):
     """
     Origin: requests library (https://github.com/psf/requests)
@@ -117,15 +295,191 @@ class RequestsCookieJar(CookieJar, MutableMapping):
 
     Unlike a regular CookieJar, this class is pickleable.
 
-    .. warning:: dictionary operations that are normally O(1) may be O(n).
+    Cookies are stored as CompactCookies (set_cookie converts other Cookies), to keep
+    the memory of sessions holding many cookies down.
+
+    Lookups by name go through an index (name -> cookies), and lookups by domain
+    through the jar's own domain keys: cookies for a request are only searched
+    in the domains its host is a suffix of. Expiring cookies are kept in a heap,
+    so expired ones are dropped without scanning the jar.
+
+    Changes to the jar can be recorded (see track_changes), to sync them to the
+    bridge's jar, and cookies already known to the bridge can be deferred
+    (see defer) until the jar is next read.
     """
 
+    # changed cookies, by (domain, path, name): the cookie, or None if removed
+    _changes: Optional[dict] = None
+
+    def __init__(self, policy=None):
+        super().__init__(policy)
+        self._reindex()
+
+    def _reindex(self) -> None:
+        # name -> cookies with that name
+        self._by_name: Dict[str, List[Cookie]] = {}
+        # heap of (expires, domain, path, name), stale entries are skipped when popped
+        self._expiry: List[tuple] = []
+        # cookies in the jar with an expiry time
+        self._expiring: int = 0
+        for cookie in iter(self):
+            self._index(cookie)
+
+    def _index(self, cookie: Cookie) -> None:
+        self._by_name.setdefault(cookie.name, []).append(cookie)
+        if cookie.expires is not None:
+            self._expiring += 1
+            heapq.heappush(self._expiry, (cookie.expires, cookie.domain, cookie.path, cookie.name))
+            if len(self._expiry) > 2 * self._expiring + 16:
+                # entries of replaced cookies pile up (e.g. a cookie refreshed on every response)
+                self._rebuild_expiry()
+
+    def _rebuild_expiry(self) -> None:
+        # rebuild the heap from the cookies in the jar, dropping stale entries
+        self._expiry = [
+            (cookie.expires, cookie.domain, cookie.path, cookie.name)
+            for paths in self.__dict__['_cookies'].values()
+            for names in paths.values()
+            for cookie in names.values()
+            if cookie.expires is not None
+        ]
+        heapq.heapify(self._expiry)
+        self._expiring = len(self._expiry)
+
+    def _unindex(self, cookie: Cookie) -> None:
+        if cookie.expires is not None:
+            self._expiring -= 1
+        named = self._by_name.get(cookie.name)
+        if named is not None:
+            named[:] = [
+                other for other in named if (other.domain, other.path) != (cookie.domain, cookie.path)
+            ]
+            if not named:
+                del self._by_name[cookie.name]
+
+    def _named(self, name: str) -> Iterable[Cookie]:
+        # cookies with this name
+        if self.__dict__.get('_deferred'):
+            self._apply_deferred()
+        return list(self._by_name.get(name, ()))
+
+    def _select(self, domain=None, path=None, name=None) -> List[Cookie]:
+        # cookies removed by clear(domain, path, name)
+        cookies = self._cookies
+        if domain is None:
+            return list(iter(self))
+        paths = cookies.get(domain, {})
+        if path is None:
+            return [cookie for names in paths.values() for cookie in names.values()]
+        names = paths.get(path, {})
+        if name is None:
+            return list(names.values())
+        return [names[name]] if name in names else []
+
+    def _lookup(self, domain: str, path: str, name: str) -> Optional[Cookie]:
+        return self._cookies.get(domain, {}).get(path, {}).get(name)
+
+    @property
+    def _cookies(self):
+        # apply deferred cookies before any read or write of the jar
+        if self.__dict__.get('_deferred'):
+            self._apply_deferred()
+        return self.__dict__['_cookies']
+
+    @_cookies.setter
+    def _cookies(self, value):
+        self.__dict__['_cookies'] = value
+
+    def track_changes(self) -> None:
+        """Start recording the cookies set and removed, starting with the cookies
+        already in the jar. See pop_changes.
+        """
+        self._changes = {
+            (cookie.domain, cookie.path, cookie.name): cookie for cookie in iter(self)
+        }
+
+    def pop_changes(self, host: Optional[str] = None) -> List[Tuple[tuple, Optional[Cookie]]]:
+        """Return and forget the recorded changes, as ((domain, path, name), cookie)
+        pairs, where cookie is None if it was removed.
+        If host is given, only changes to cookies matching it are returned.
+        """
+        if not self._changes:
+            return []
+        if host is None:
+            changes, self._changes = self._changes, {}
+            return list(changes.items())
+        popped = [key for key in self._changes if domain_match(host, key[0])]
+        return [(key, self._changes.pop(key)) for key in popped]
+
+    def defer(self, cookies: Iterable[Cookie]) -> None:
+        """Add cookies known to the bridge, without recording them as changes.
+        They are applied when the jar is next used.
+        """
+        self.__dict__.setdefault('_deferred', []).append(cookies)
+
+    def _apply_deferred(self) -> None:
+        deferred, self._deferred = self._deferred, []
+        # suspend recording, the bridge has them already
+        changes, self._changes = self._changes, None
+        try:
+            for cookies in deferred:
+                for cookie in cookies:
+                    if cookie.is_expired():
+                        # deleted by the server
+                        self.discard(cookie.domain, cookie.path, cookie.name)
+                    else:
+                        self.set_cookie(cookie)
+        finally:
+            self._changes = changes
+
+    def clear(self, domain=None, path=None, name=None):
+        with self._cookies_lock:
+            removed: List[Cookie] = self._select(domain, path, name)
+            super().clear(domain, path, name)
+            if domain is None:
+                self._by_name, self._expiry, self._expiring = {}, [], 0
+            else:
+                for cookie in removed:
+                    self._unindex(cookie)
+            if self._changes is not None:
+                # record the removed cookies
+                for cookie in removed:
+                    self._changes[(cookie.domain, cookie.path, cookie.name)] = None
+
+    def discard(self, domain: str, path: str, name: str) -> None:
+        """Remove a cookie if present (clear raises KeyError if it isn't)."""
+        with self._cookies_lock:
+            if self._lookup(domain, path, name) is not None:
+                self.clear(domain, path, name)
+
+    def clear_expired_cookies(self):
+        """Discard all expired cookies, popping them from the expiry heap."""
+        now: float = time.time()
+        with self._cookies_lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                expires, *key = heapq.heappop(self._expiry)
+                cookie = self._lookup(*key)
+                # skip entries of cookies since removed or replaced
+                if cookie is not None and cookie.expires == expires:
+                    self.clear(*key)
+
+    def _cookies_for_request(self, request):
+        """Return a list of cookies to be returned to server, only looking up
+        the domains the request host is a suffix of (instead of every domain).
+        """
+        cookies = []
+        jar = self._cookies
+        for domain in request_domains(request):
+            if domain in jar:
+                cookies.extend(self._cookies_for_domain(domain, request))
+        return cookies
+
     def get(self, name, default=None, domain=None, path=None):
         """Dict-like get() that also supports optional domain and path args in
         order to resolve naming collisions from using one cookie jar over
         multiple domains.
 
-        .. warning:: operation is O(n), not O(1).
+        Only the cookies with that name are looked at.
         """
         try:
             return self._find_no_duplicates(name, domain, path)
@@ -200,11 +554,11 @@ class RequestsCookieJar(CookieJar, MutableMapping):
 
     def list_domains(self):
         """Utility method to list all the domains in the jar."""
-        domains = []
-        for cookie in iter(self):
-            if cookie.domain not in domains:
-                domains.append(cookie.domain)
-        return domains
+        return [
+            domain
+            for domain, paths in self._cookies.items()
+            if any(names for names in paths.values())
+        ]
 
     def list_paths(self):
         """Utility method to list all the paths in the jar."""
@@ -234,10 +588,15 @@ class RequestsCookieJar(CookieJar, MutableMapping):
 
         :rtype: dict
         """
+        if domain is None:
+            cookies = iter(self)
+        else:
+            # only the cookies of that domain
+            cookies = self._select(domain, path)
         return {
             cookie.name: cookie.value
-            for cookie in iter(self)
-            if (domain is None or cookie.domain == domain) and (path is None or cookie.path == path)
+            for cookie in cookies
+            if path is None or cookie.path == path
         }
 
     def __contains__(self, name):
@@ -251,7 +610,7 @@ class RequestsCookieJar(CookieJar, MutableMapping):
         exception if there are more than one cookie with name. In that case,
         use the more explicit get() method instead.
 
-        .. warning:: operation is O(n), not O(1).
+        Only the cookies with that name are looked at.
         """
         return self._find_no_duplicates(name)
 
@@ -269,13 +628,22 @@ class RequestsCookieJar(CookieJar, MutableMapping):
         remove_cookie_by_name(self, name)
 
     def set_cookie(self, cookie, *args, **kwargs):
+        cookie = compact_cookie(cookie)
         if (
             hasattr(cookie.value, "startswith")
             and cookie.value.startswith('"')
             and cookie.value.endswith('"')
         ):
             cookie.value = cookie.value.replace('\\"', "")
-        return super().set_cookie(cookie, *args, **kwargs)
+        with self._cookies_lock:
+            if self._changes is not None:
+                self._changes[(cookie.domain, cookie.path, cookie.name)] = cookie
+            # drop the replaced cookie from the indexes
+            replaced = self._lookup(cookie.domain, cookie.path, cookie.name)
+            if replaced is not None:
+                self._unindex(replaced)
+            super().set_cookie(cookie, *args, **kwargs)
+            self._index(cookie)
 
     def update(self, other):
         """Updates this jar with cookies from another CookieJar or dict-like"""
@@ -297,12 +665,8 @@ class RequestsCookieJar(CookieJar, MutableMapping):
         :param path: (optional) string containing path of cookie
         :return: cookie.value
         """
-        for cookie in iter(self):
-            if (
-                cookie.name == name
-                and (domain is None or cookie.domain == domain)
-                and (path is None or cookie.path == path)
-            ):
+        for cookie in self._named(name):
+            if (domain is None or cookie.domain == domain) and (path is None or cookie.path == path):
                 return cookie.value
 
         raise KeyError(f"name={name!r}, domain={domain!r}, path={path!r}")
@@ -320,12 +684,8 @@ class RequestsCookieJar(CookieJar, MutableMapping):
         :return: cookie.value
         """
         toReturn = None
-        for cookie in iter(self):
-            if (
-                cookie.name == name
-                and (domain is None or cookie.domain == domain)
-                and (path is None or cookie.path == path)
-            ):
+        for cookie in self._named(name):
+            if (domain is None or cookie.domain == domain) and (path is None or cookie.path == path):
                 if toReturn is not None:
                     # if there are multiple cookies that meet passed in criteria
                     raise CookieConflictError(f"There are multiple cookies with name, {name!r}")
@@ -341,6 +701,10 @@ class RequestsCookieJar(CookieJar, MutableMapping):
         state = self.__dict__.copy()
         # remove the unpickleable RLock object
         state.pop("_cookies_lock")
+        # the indexes are rebuilt when unpickled
+        state.pop("_by_name", None)
+        state.pop("_expiry", None)
+        state.pop("_expiring", None)
         return state
 
     def __setstate__(self, state):
@@ -348,6 +712,12 @@ class RequestsCookieJar(CookieJar, MutableMapping):
         self.__dict__.update(state)
         if "_cookies_lock" not in self.__dict__:
             self._cookies_lock = threading.RLock()
+        # convert cookies pickled as plain Cookies
+        for paths in self.__dict__['_cookies'].values():
+            for names in paths.values():
+                for name, cookie in names.items():
+                    names[name] = compact_cookie(cookie)
+        self._reindex()
 
     def copy(self):
         """Return a copy of this RequestsCookieJar."""
@@ -366,7 +736,9 @@ def remove_cookie_by_name(
 ):
     """Removes a cookie by name, by default over all domains and paths."""
     clearables = []
-    for cookie in cookiejar:
+    # indexed jars only look at the cookies with that name
+    cookies = cookiejar._named(name) if isinstance(cookiejar, RequestsCookieJar) else cookiejar
+    for cookie in cookies:
         if cookie.name != name:
             continue
         if domain is not None and domain != cookie.domain:
@@ -379,7 +751,7 @@ def remove_cookie_by_name(
         cookiejar.clear(domain, path, name)
 
 
-def create_cookie(name: str, value: str, **kwargs: Any) -> Cookie:
+def create_cookie(name: str, value: str, **kwargs: Any) -> CompactCookie:
     """Make a cookie from underspecified parameters."""
     result = {
         "version": 0,
@@ -407,7 +779,7 @@ def create_cookie(name: str, value: str, **kwargs: Any) -> Cookie:
     result["domain_initial_dot"] = result["domain"].startswith(".")
     result["path_specified"] = bool(result["path"])
 
-    return Cookie(**result)
+    return CompactCookie(**result)
 
 
 def cookiejar_from_dict(cookie_dict: dict) -> RequestsCookieJar:
@@ -445,7 +817,7 @@ def get_cookie_header(
 def extract_cookies_to_jar(
     request_url: str,
     request_headers,
-    cookie_jar: RequestsCookieJar,
+    cookie_jar: Optional[RequestsCookieJar],
     response_headers: dict,
 ) -> RequestsCookieJar:
     response_cookie_jar = cookiejar_from_dict({})
@@ -459,7 +831,226 @@ def extract_cookies_to_jar(
     res = MockResponse(http_message)
     response_cookie_jar.extract_cookies(res, req)
 
-    merge_cookies(cookie_jar, response_cookie_jar)
+    if cookie_jar is not None:
+        merge_cookies(cookie_jar, response_cookie_jar)
+    return response_cookie_jar
+
+
+def set_cookie_headers(response_headers: dict) -> List[str]:
+    # Set-Cookie values of a bridge response (header names are matched case-insensitively)
+    values: Optional[List[str]] = response_headers.get('Set-Cookie')
+    if values is not None:
+        return values
+    for header_name, header_values in response_headers.items():
+        if header_name.lower() == 'set-cookie':
+            return header_values
+    return []
+
+
+# cookie-attributes kept apart from the nonstandard ones (see CookieJar._normalized_cookie_tuples)
+_value_attrs: tuple = ('version', 'expires', 'max-age', 'domain', 'path', 'port', 'comment', 'commenturl')
+_boolean_attrs: tuple = ('discard', 'secure')
+
+
+def parse_set_cookie(
+    header: str, req_host: str, erhn: str, req_path: str, now: int, req_port: Optional[str] = '80'
+) -> Optional[CompactCookie]:
+    """Parse a Set-Cookie header sent in response to a request, with the rules of
+    CookieJar.make_cookies and DefaultCookiePolicy for Netscape (and RFC 2109) cookies.
+    `req_port` is the request port, as given by http.cookiejar.request_port.
+
+    Returns None if the cookie is rejected. Cookies deleted by the server are returned expired
+    (CookieJar deletes them before the policy is checked).
+    """
+    pairs: List[str] = header.split(';')
+    name, sep, value = pairs[0].strip().partition('=')
+    name = name.strip()
+    if not name:
+        return None
+    value = value.strip() if sep else None
+
+    # the first value of each standard attribute is kept
+    standard: dict = {}
+    rest: dict = {}
+    max_age_set: bool = False
+    for pair in pairs[1:]:
+        key, sep, attr = pair.strip().partition('=')
+        key = key.strip()
+        if not key:
+            continue
+        attr = attr.strip() if sep else None
+        lc: str = key.lower()
+        if lc in _value_attrs or lc in _boolean_attrs:
+            key = lc
+        if key == 'version':
+            if attr is not None:
+                attr = strip_quotes(attr)
+        elif key == 'expires':
+            if attr is not None:
+                # None if invalid
+                attr = http2time(strip_quotes(attr))
+        if key in _boolean_attrs and attr is None:
+            attr = True
+        if key in standard:
+            continue
+        if key == 'domain':
+            if attr is None:
+                return None
+            attr = attr.lower()
+        elif key == 'expires':
+            if max_age_set or attr is None:
+                # max-age takes precedence over expires, invalid dates make session cookies
+                continue
+        elif key == 'max-age':
+            max_age_set = True
+            try:
+                attr = int(attr)
+            except (TypeError, ValueError):
+                # CookieJar drops cookies with an invalid max-age
+                return None
+            key, attr = 'expires', now + attr
+        if key in _value_attrs or key in _boolean_attrs:
+            if attr is None and key not in ('port', 'comment', 'commenturl'):
+                return None
+            standard[key] = attr
+        else:
+            rest[key] = attr
+
+    try:
+        version: int = int(standard.get('version', 0))
+    except ValueError:
+        return None
+
+    path: Optional[str] = standard.get('path')
+    path_specified: bool = bool(path)
+    if path_specified:
+        path = escape_path(path)
+    else:
+        # default to the directory of the request path (with its trailing slash for RFC 2109)
+        path = req_path
+        index: int = path.rfind('/')
+        if index != -1:
+            path = path[:index] if version == 0 else path[: index + 1]
+        path = path or '/'
+
+    domain: Optional[str] = standard.get('domain')
+    domain_specified: bool = domain is not None
+    domain_initial_dot: bool = domain_specified and domain.startswith('.')
+    if not domain_specified:
+        domain = erhn
+    elif not domain_initial_dot:
+        domain = f'.{domain}'
+
+    port: Optional[str] = None
+    port_specified: bool = False
+    if 'port' in standard:
+        port = standard['port']
+        if port is None:
+            # sent back on the request port only
+            port = req_port
+        else:
+            port_specified = True
+            port = ''.join(port.split())
+
+    expires: Optional[int] = standard.get('expires')
+    cookie: CompactCookie = CompactCookie(
+        version=version,
+        name=name,
+        value=value,
+        port=port,
+        port_specified=port_specified,
+        domain=domain,
+        domain_specified=domain_specified,
+        domain_initial_dot=domain_initial_dot,
+        path=path,
+        path_specified=path_specified,
+        secure=standard.get('secure', False),
+        expires=expires,
+        discard=expires is None or standard.get('discard', False),
+        comment=standard.get('comment'),
+        comment_url=standard.get('commenturl'),
+        rest=rest,
+    )
+    if expires is not None and expires <= now:
+        return cookie
+    if version == 1:
+        # RFC 2109 cookies are treated as Netscape cookies
+        cookie.rfc2109 = True
+        cookie.version = version = 0
+    if version > 0:
+        return None
+
+    if domain_specified:
+        undotted: str = domain[1:]
+        # reject domains without an embedded dot, and domains the request host isn't within
+        if '.' not in undotted and not erhn.endswith('.local'):
+            return None
+        if not (
+            erhn.endswith(domain)
+            or erhn.endswith(f'{undotted}.local')
+            or f'.{erhn}'.endswith(domain)
+        ):
+            return None
+
+    if port_specified:
+        # the request port must be listed
+        for listed in port.split(','):
+            try:
+                int(listed)
+            except ValueError:
+                return None
+            if listed == (req_port or '80'):
+                break
+        else:
+            return None
+    return cookie
+
+
+def extract_response_cookies(
+    request_url: str,
+    request_headers,
+    response_headers: dict,
+    cookie_jar: Optional[RequestsCookieJar] = None,
+    defer: bool = False,
+) -> RequestsCookieJar:
+    """Parse the Set-Cookie headers of a bridge response into a new jar,
+    adding them to (or deleting them from) `cookie_jar` along the way.
+    If `defer`, cookie_jar receives them through RequestsCookieJar.defer.
+
+    Equivalent to extract_cookies_to_jar, without building mock requests and responses,
+    and without any work for responses that don't set cookies.
+    """
+    response_cookie_jar: RequestsCookieJar = RequestsCookieJar()
+    headers: List[str] = set_cookie_headers(response_headers)
+    if not headers:
+        return response_cookie_jar
+
+    req: MockRequest = MockRequest(request_url, request_headers or {})
+    req_host, erhn = eff_request_host(req)
+    req_path: str = request_path(req)
+    req_port: Optional[str] = request_port(req)
+    now: int = int(time.time())
+    cookies: List[Cookie] = []
+    for header in headers:
+        cookie: Optional[Cookie] = parse_set_cookie(
+            header, req_host, erhn, req_path, now, req_port
+        )
+        if cookie is None:
+            continue
+        cookies.append(cookie)
+        if cookie.expires is None or cookie.expires > now:
+            response_cookie_jar.set_cookie(cookie)
+
+    if cookie_jar is not None and cookies:
+        if defer:
+            cookie_jar.defer(cookies)
+        else:
+            for cookie in cookies:
+                if cookie.expires is not None and cookie.expires <= now:
+                    # deleted by the server
+                    cookie_jar.discard(cookie.domain, cookie.path, cookie.name)
+                else:
+                    cookie_jar.set_cookie(cookie)
     return response_cookie_jar
 
 
@@ -488,7 +1079,39 @@ def cookiejar_to_list(cookiejar: RequestsCookieJar) -> list:
         {
             'session' if key == 'discard' else key: val
             for key in cookie_keys
-            if key in cookie.__dict__ and (val := getattr(cookie, key)) is not None
+            if (val := getattr(cookie, key, None)) is not None
         }
         for cookie in cookiejar
     ]
+
+
+def changes_to_list(changes: List[Tuple[tuple, Optional[Cookie]]]) -> list:
+    # changes of a jar (see RequestsCookieJar.pop_changes), as sent to the bridge
+    cookies: list = cookiejar_to_list(cookie for _, cookie in changes if cookie is not None)
+    # removed cookies are sent expired
+    cookies.extend(
+        {'name': name, 'value': '', 'domain': domain, 'path': path, 'expires': 1}
+        for (domain, path, name), cookie in changes
+        if cookie is None
+    )
+    return cookies
+
+
+def domain_match(host: str, domain: str) -> bool:
+    # if a cookie set for `domain` applies to `host` (cookies without a domain apply anywhere)
+    domain = domain.lstrip('.').lower()
+    return not domain or host == domain or host.endswith(f'.{domain}')
+
+
+def request_domains(request) -> List[str]:
+    # cookie domains that can match a request (see DefaultCookiePolicy.domain_return_ok):
+    # every suffix of its host, with and without a leading dot, and cookies without a domain
+    req_host, erhn = eff_request_host(request)
+    domains: List[str] = ['']
+    for host in {req_host, erhn}:
+        labels: List[str] = host.split('.')
+        for index in range(len(labels)):
+            suffix: str = '.'.join(labels[index:])
+            if suffix:
+                domains.extend((suffix, f'.{suffix}'))
+    return domains
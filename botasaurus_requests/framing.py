@@ -0,0 +1,268 @@
+import os
+import struct
+import uuid
+from base64 import b64encode
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+from .json_codec import dumps, loads
+
+'''
+Length-prefixed binary envelope for bridge payloads.
+
+Request and response bodies travel as raw bytes next to the JSON metadata,
+instead of being base64 encoded inside it:
+
+    envelope := MAGIC | uint32 meta_length | meta (JSON) | uint32 blob_count | blob*
+    blob     := uint64 length | bytes
+
+Objects in the metadata that carry a body reference their blob with "bodyIndex".
+Replies that don't start with MAGIC are plain JSON.
+Without binary framing, payloads are plain JSON: multipart uploads are still streamed,
+base64 encoded chunk by chunk into their "requestBody" string.
+
+Streamed replies (/stream) carry only the metadata, followed by the raw body
+of the final response until the end of the reply:
+
+    stream := MAGIC | uint32 meta_length | meta (JSON) | body...
+
+Streamed batches (/multistream) carry one envelope per request, in the order
+the requests complete, each with the "index" of its request in the batch:
+
+    multistream := envelope*
+'''
+
+# enable with BOTASAURUS_REQUESTS_FRAMING=binary (requires bridge support)
+ENABLED: bool = os.getenv('BOTASAURUS_REQUESTS_FRAMING') == 'binary'
+
+MAGIC: bytes = b'\x00BRF'  # can never start a JSON document
+U32: struct.Struct = struct.Struct('>I')
+U64: struct.Struct = struct.Struct('>Q')
+
+
+class Envelope:
+    '''
+    Envelope with streamed blobs (e.g. multipart uploads).
+    Sent chunk by chunk instead of being joined in memory.
+    '''
+
+    def __init__(self, parts: list) -> None:
+        self.parts: list = parts
+
+    def __len__(self) -> int:
+        return sum(len(part) for part in self.parts)
+
+    def __iter__(self) -> Iterator[bytes]:
+        for part in self.parts:
+            if isinstance(part, bytes):
+                yield part
+            else:
+                yield from part
+
+
+class Base64Body:
+    '''
+    Base64 encoding of a streamed body (e.g. multipart uploads), for plain JSON payloads.
+    Encoded chunk by chunk while it is sent.
+    '''
+
+    def __init__(self, body) -> None:
+        self.body = body
+
+    def __len__(self) -> int:
+        return (len(self.body) + 2) // 3 * 4
+
+    def __iter__(self) -> Iterator[bytes]:
+        rest: bytes = b''
+        for chunk in self.body:
+            chunk = rest + chunk
+            # encode whole 3 byte groups, so the chunks join into one base64 string
+            cut: int = len(chunk) - len(chunk) % 3
+            rest = chunk[cut:]
+            if cut:
+                yield b64encode(chunk[:cut])
+        if rest:
+            yield b64encode(rest)
+
+
+class PreparedPayload(dict):
+    '''
+    /request payload starting from session-static fields whose JSON encoding
+    was cached (see TLSClient.static_payload). Only the other fields are encoded
+    per request, so the static fields must not be changed in the payload.
+    '''
+
+    __slots__ = ('static_keys', 'static_json')
+
+    def __init__(self, static: dict, static_json: bytes) -> None:
+        super().__init__(static)
+        self.static_keys: dict = static
+        # the encoded fields, without the enclosing braces
+        self.static_json: bytes = static_json
+
+
+def to_json(payload: Union[dict, list]) -> bytes:
+    '''
+    JSON encode a payload or a list of payloads, reusing the cached encoding of prepared ones
+    '''
+    if isinstance(payload, PreparedPayload):
+        dynamic: dict = {
+            key: value for key, value in payload.items() if key not in payload.static_keys
+        }
+        if not dynamic:
+            return b'{' + payload.static_json + b'}'
+        if not payload.static_json:
+            return dumps(dynamic)
+        return b'{' + payload.static_json + b',' + dumps(dynamic)[1:]
+    if isinstance(payload, list) and any(isinstance(item, PreparedPayload) for item in payload):
+        return b'[' + b','.join(map(to_json, payload)) + b']'
+    return dumps(payload)
+
+
+def encode(payload: Union[dict, list]) -> Union[bytes, Envelope]:
+    '''
+    Encode a /request payload or a /multirequest list of payloads
+    '''
+    blobs: list = []
+    for item in payload if isinstance(payload, list) else (payload,):
+        body = item.get('requestBody')
+        if body is None:
+            continue
+        # move the body out of the metadata
+        item['bodyIndex'] = len(blobs)
+        item['requestBody'] = None
+        blobs.append(body.encode('utf-8') if isinstance(body, str) else body)
+
+    meta: bytes = to_json(payload)
+    parts: list = [MAGIC, U32.pack(len(meta)), meta, U32.pack(len(blobs))]
+    for blob in blobs:
+        parts.append(U64.pack(len(blob)))
+        parts.append(blob)
+    if all(isinstance(blob, (bytes, bytearray)) for blob in blobs):
+        return b''.join(parts)
+    return Envelope(parts)
+
+
+# stands in for streamed bodies in JSON payloads (see encode_json)
+BODY_MARKER: str = f'body-{uuid.uuid4().hex}-'
+
+
+def encode_json(payload: Union[dict, list]) -> Union[bytes, Envelope]:
+    '''
+    JSON encode a /request payload or a /multirequest list of payloads.
+    Streamed bodies (e.g. multipart uploads) are base64 encoded while they are sent.
+    '''
+    bodies: list = []
+    for item in payload if isinstance(payload, list) else (payload,):
+        body = item.get('requestBody')
+        if body is None or isinstance(body, (str, bytes, bytearray)):
+            continue
+        # encode a marker in place of the body, and split the JSON around it
+        item['requestBody'] = f'{BODY_MARKER}{len(bodies)}'
+        bodies.append(body)
+
+    data: bytes = to_json(payload)
+    if not bodies:
+        return data
+    parts: list = []
+    for index, body in enumerate(bodies):
+        head, data = data.split(f'{BODY_MARKER}{index}'.encode(), 1)
+        parts.append(head)
+        parts.append(Base64Body(body))
+    parts.append(data)
+    return Envelope(parts)
+
+
+def dump(payload: Union[dict, list]) -> Union[bytes, Envelope]:
+    '''
+    Encode a payload for the bridge, framed if enabled, else as JSON
+    '''
+    return encode(payload) if ENABLED else encode_json(payload)
+
+
+def decode(data: bytes) -> Union[dict, list]:
+    '''
+    Decode a bridge reply, framed or plain JSON
+    '''
+    if not data.startswith(MAGIC):
+        return loads(data)
+    view = memoryview(data)
+    offset: int = len(MAGIC)
+    # metadata
+    (meta_len,) = U32.unpack_from(view, offset)
+    offset += U32.size
+    meta = loads(view[offset : offset + meta_len])
+    offset += meta_len
+    # bodies (sliced without copying until they are attached)
+    (count,) = U32.unpack_from(view, offset)
+    offset += U32.size
+    blobs: List[memoryview] = []
+    for _ in range(count):
+        (size,) = U64.unpack_from(view, offset)
+        offset += U64.size
+        blobs.append(view[offset : offset + size])
+        offset += size
+    attach_bodies(meta, blobs)
+    return meta
+
+
+def attach_bodies(obj: Union[dict, list], blobs: List[memoryview]) -> None:
+    # walk the reply (list of replies, response, history) and fill in the bodies
+    if isinstance(obj, list):
+        for item in obj:
+            attach_bodies(item, blobs)
+        return
+    if 'bodyIndex' in obj:
+        blob = blobs[obj.pop('bodyIndex')]
+        # binary bodies stay bytes, utf-8 validated bodies become str
+        obj['body'] = blob.tobytes() if obj.get('isBase64') else str(blob, 'utf-8')
+    for key in ('response', 'history'):
+        if obj.get(key) is not None:
+            attach_bodies(obj[key], blobs)
+
+
+def read_exact(fp: BinaryIO, size: int) -> bytes:
+    # read exactly `size` bytes from a stream
+    data: bytes = fp.read(size)
+    while len(data) < size:
+        chunk: bytes = fp.read(size - len(data))
+        if not chunk:
+            raise EOFError('Bridge reply ended unexpectedly')
+        data += chunk
+    return data
+
+
+def read_head(fp: BinaryIO) -> Tuple[dict, bool]:
+    '''
+    Read the metadata of a streamed reply, leaving the body in `fp`.
+    Returns the metadata, and whether the body follows it in the stream.
+    '''
+    prefix: bytes = fp.read(len(MAGIC))
+    if prefix != MAGIC:
+        # not streamed (e.g. an error), the whole reply is JSON
+        return loads(prefix + fp.read()), False
+    (meta_len,) = U32.unpack(read_exact(fp, U32.size))
+    return loads(read_exact(fp, meta_len)), True
+
+
+def read_frame(fp: BinaryIO) -> Optional[dict]:
+    '''
+    Read the next envelope of a streamed batch, or None at the end of the stream
+    '''
+    prefix: bytes = fp.read(len(MAGIC))
+    if not prefix:
+        return None
+    if prefix != MAGIC and MAGIC.startswith(prefix):
+        # short read
+        prefix += read_exact(fp, len(MAGIC) - len(prefix))
+    if prefix != MAGIC:
+        # not framed (e.g. an error), the rest of the reply is JSON
+        return loads(prefix + fp.read())
+    (meta_len,) = U32.unpack(read_exact(fp, U32.size))
+    meta = loads(read_exact(fp, meta_len))
+    (count,) = U32.unpack(read_exact(fp, U32.size))
+    blobs: List[memoryview] = []
+    for _ in range(count):
+        (size,) = U64.unpack(read_exact(fp, U64.size))
+        blobs.append(memoryview(read_exact(fp, size)))
+    attach_bodies(meta, blobs)
+    return meta
@@ -1,12 +1,10 @@
-import os
 import re
 from os.path import dirname, exists, join
 from random import choice as rchoice
 from random import randint as rint
 from random import randrange as rrange
-from typing import Callable, Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Type
 
-import httpx
 import json
  
 def read_json(path):
@@ -79,6 +77,8 @@ class ChromeVersions(VersionScraper):
         return re.sub(r'[^\d\.]', '', line)
 
     def download(self) -> List[str]:
+        import httpx
+
         versions: List[str]
         with httpx.stream('GET', self.resource) as r:
             lines = r.iter_lines()
@@ -112,6 +112,8 @@ class FirefoxVersions(VersionScraper):
     file_name: str = join(dirname(__file__), "bin", "FF_VERSIONS.json")
 
     def download(self) -> List[str]:
+        import httpx
+
         resp = httpx.get(self.resource)
         # gather version numbers
         versions: List[str]
@@ -132,13 +134,26 @@ class FirefoxVersions(VersionScraper):
         return f'Mozilla/5.0 (%PLAT%; rv:{ver}) Gecko/20100101 Firefox/{ver}'
 
 
-if not os.getenv('BOTASAURUS_REQUESTS_MODULE'):
+scrapers: Dict[str, Type[VersionScraper]] = {'chrome': ChromeVersions, 'firefox': FirefoxVersions}
+generators: Dict[str, Callable] = {}
+
+
+def get_generator(browser: str) -> Callable:
     '''
-    Define global `chrome` and `firefox` header generators
+    Returns the user agent generator of a browser, loading its saved versions on first use
     '''
-    chrome: Callable = ChromeVersions().generate
-    firefox: Callable = FirefoxVersions().generate
-    browsers: dict = {'chrome': chrome, 'firefox': firefox}
+    if browser not in generators:
+        generators[browser] = scrapers[browser]().generate
+    return generators[browser]
+
+
+def __getattr__(name: str):
+    # backwards compatibility: global `chrome`, `firefox` and `browsers` header generators
+    if name in scrapers:
+        return get_generator(name)
+    if name == 'browsers':
+        return {browser: get_generator(browser) for browser in scrapers}
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 class Headers:
@@ -154,7 +169,9 @@ class Headers:
         self, browser: Optional[str] = None, os: Optional[str] = None, headers: bool = True
     ) -> None:
         self._platform: Callable = self._os.get(os, OSHeaders.random_os)
-        self._browser: Callable = browsers.get(browser, (chrome, firefox)[rrange(2)])
+        if browser not in scrapers:
+            browser = ('chrome', 'firefox')[rrange(2)]
+        self._browser: Callable = get_generator(browser)
         self._headers: bool = headers
 
     @staticmethod
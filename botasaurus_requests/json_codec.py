@@ -0,0 +1,105 @@
+import os
+from json import dumps as std_dumps
+from json import loads as std_loads
+from math import isfinite
+from typing import Any, Callable, Dict, Tuple, Type, Union
+
+'''
+JSON codec of bridge payloads, bridge replies and Response.json.
+
+Uses orjson, or msgspec, when installed (pip install orjson), else the json module.
+Pick one with BOTASAURUS_REQUESTS_JSON=orjson|msgspec|json.
+
+- dumps(obj) -> bytes (compact, utf-8)
+- loads(data) -> object, from str, bytes, bytearray or memoryview
+
+Values a fast codec refuses (e.g. integers over 64 bits, non-str keys,
+byte order marks) are handed to the json module, so results match it.
+So are NaN and infinities, which the fast codecs would write as null:
+they're encoded as NaN / Infinity / -Infinity, like the json module does.
+'''
+
+Codec = Tuple[Callable, Callable, Tuple[Type[Exception], ...], Tuple[Type[Exception], ...]]
+
+
+def _orjson() -> Codec:
+    import orjson
+
+    return orjson.dumps, orjson.loads, (TypeError,), (ValueError,)
+
+
+def _msgspec() -> Codec:
+    import msgspec
+
+    encoder = msgspec.json.Encoder()
+    decoder = msgspec.json.Decoder()
+    return (
+        encoder.encode,
+        decoder.decode,
+        (TypeError, OverflowError, msgspec.EncodeError),
+        (msgspec.DecodeError,),
+    )
+
+
+codecs: Dict[str, Callable[[], Codec]] = {'orjson': _orjson, 'msgspec': _msgspec}
+
+
+def _std_dumps(obj: Any) -> bytes:
+    return std_dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def _std_loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    return std_loads(data.tobytes() if isinstance(data, memoryview) else data)
+
+
+def _non_finite(obj: Any) -> bool:
+    # whether obj holds a NaN or infinite float
+    stack: list = [obj]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, float):
+            if not isfinite(item):
+                return True
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return False
+
+
+def _select() -> Tuple[str, Callable[[Any], bytes], Callable[[Any], Any]]:
+    name: str = os.getenv('BOTASAURUS_REQUESTS_JSON', '')
+    if name == 'json':
+        return name, _std_dumps, _std_loads
+    if name and name not in codecs:
+        raise ValueError(f'`{name}` is not a valid JSON codec: {("json", *codecs)}')
+    for candidate in (name,) if name else tuple(codecs):
+        try:
+            encode, decode, encode_errors, decode_errors = codecs[candidate]()
+        except ImportError:
+            if name:
+                raise
+            continue
+
+        def dumps(obj: Any) -> bytes:
+            try:
+                data: bytes = encode(obj)
+            except encode_errors:
+                return _std_dumps(obj)
+            # non-finite floats come out as null, only then is the object scanned for them
+            if b'null' in data and _non_finite(obj):
+                return _std_dumps(obj)
+            return data
+
+        def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+            try:
+                return decode(data)
+            except decode_errors:
+                return _std_loads(data)
+
+        return candidate, dumps, loads
+    return 'json', _std_dumps, _std_loads
+
+
+# name of the codec in use: orjson, msgspec or json
+CODEC, dumps, loads = _select()
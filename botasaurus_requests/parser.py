@@ -1,4 +1,6 @@
+import asyncio
 import contextlib
+import inspect
 import weakref
 from functools import partial
 from typing import List, MutableMapping, Optional, Set, Union
@@ -482,12 +484,17 @@ class HTML(BaseParser):
         return self
 
     async def __anext__(self):
-        while True:
-            url = self.next(fetch=False, next_symbol=self.next_symbol)
-            if not url:
-                break
+        url = self.next(fetch=False, next_symbol=self.next_symbol)
+        if not url:
+            raise StopAsyncIteration
+        if inspect.iscoroutinefunction(self.session.get):
+            # AsyncSession
             response = await self.session.get(url)
-            return response.html
+        else:
+            # don't block the event loop with a synchronous session
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(None, self.session.get, url)
+        return response.html
 
     def add_next_symbol(self, next_symbol):
         self.next_symbol.append(next_symbol)
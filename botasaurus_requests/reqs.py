@@ -1,15 +1,17 @@
+import os
 import traceback
-from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
 from concurrent.futures import wait as futures_wait
 from dataclasses import dataclass
 from functools import partial
-from threading import Thread
+from threading import Lock
 from typing import Callable, Dict, Iterable, List, Optional, Union, overload
 from urllib.parse import urlencode
 
 import gevent
 from gevent.pool import Pool
-from .session import Session, chrome
+from .backends import get_backend
+from .session import Session, chrome, session_pool
 from . import session
 from . import response
 
@@ -62,6 +64,9 @@ class TLSRequest:
         'certificate_pinning',
         'disable_ipv6',
         'detect_encoding',
+        'transport',
+        'server_cookies',
+        'history_bodies',
     }
 
     def __init__(
@@ -105,18 +110,22 @@ class TLSRequest:
 
     def _build_session(self, session=None):
         if session is None:
-            if self.sess_kwargs:
-                # if session kwargs are passed, configure a new session with them
-                self.session = Session(temp=True, **self.sess_kwargs)
-            else:
-                # else use a preconfigured session
-                self.session = chrome.Session(temp=True)
+            # borrow a warm session for this host and options
+            self._pool_key = session_pool.make_key(self.url, self.sess_kwargs)
+            self.session = session_pool.acquire(self._pool_key, self._new_session)
             self._close = True
         else:
             # don't close adapters after each request if the user provided the session
             self.session = session
             self._close = False
 
+    def _new_session(self):
+        if self.sess_kwargs:
+            # if session kwargs are passed, configure a new session with them
+            return Session(temp=True, **self.sess_kwargs)
+        # else use a preconfigured session
+        return chrome.Session(temp=True)
+
     def send(self, **kwargs):
         '''
         Prepares request based on parameter passed to constructor and optional ``kwargs```.
@@ -140,50 +149,134 @@ class TLSRequest:
             self.close_session()
         return self
 
+    async def asend(self, **kwargs):
+        '''
+        Like ``send``, on the running asyncio event loop
+        '''
+        merged_kwargs = {}
+        merged_kwargs.update(self.kwargs)
+        merged_kwargs.update(kwargs)
+        # rebuild session if it was deleted
+        if self.session is None:
+            self._build_session()
+        try:
+            proc = self.session.request(self.method, self.url, **merged_kwargs, process=False)
+            await proc.asend()
+            self.response = proc.response
+        except Exception as e:
+            if self.raise_exception:
+                raise e
+            self.exception = e
+            self.traceback = traceback.format_exc()
+        finally:
+            self.close_session()
+        return self
+
     def close_session(self) -> None:
         if self._close and self.session is not None:
-            # close the session if it was created by this request
-            self.session.close()
+            # return the session to the pool if it was created by this request
+            session_pool.release(self._pool_key, self.session)
             self.session = None
 
 
+# lazy requests share one bounded thread pool (see get_lazy_executor)
+LAZY_WORKERS: int = int(os.getenv('BOTASAURUS_REQUESTS_LAZY_WORKERS', 32))
+
+_lazy_executor: Optional[ThreadPoolExecutor] = None
+_lazy_executor_pid: Optional[int] = None
+_lazy_executor_lock: Lock = Lock()
+
+
+def get_lazy_executor() -> ThreadPoolExecutor:
+    '''
+    Return the executor shared by lazy (nohup) requests, with at most LAZY_WORKERS threads.
+    Requests beyond that are queued.
+    '''
+    global _lazy_executor, _lazy_executor_pid
+    with _lazy_executor_lock:
+        # threads aren't inherited by forked processes
+        if _lazy_executor is None or _lazy_executor_pid != os.getpid():
+            _lazy_executor = ThreadPoolExecutor(
+                LAZY_WORKERS, thread_name_prefix='botasaurus-requests-lazy'
+            )
+            _lazy_executor_pid = os.getpid()
+        return _lazy_executor
+
+
 class LazyTLSRequest(TLSRequest):
     '''
     This will send the request immediately, but doesn't wait for the response to be ready
     until an attribute of the response is accessed
+
+    Methods:
+        wait(timeout=None): Wait for the response. Returns True if it is ready.
+        cancel(): Cancel the request.
     '''
 
     def __init__(self, *args, **kwargs):
-        executor: Optional[ThreadPoolExecutor] = kwargs.pop('executor', None)
+        executor: ThreadPoolExecutor = kwargs.pop('executor', None) or get_lazy_executor()
         super().__init__(*args, **kwargs)
 
-        self._thread: Union[Thread, Future]
-        if executor:
-            self._thread = executor.submit(self._send)
-        else:
-            self._thread = Thread(target=self._send)
-            self._thread.start()
         self.complete: bool = False
+        self.cancelled: bool = False
+        self._future: Future = executor.submit(self._send)
 
     def __repr__(self):
+        if self.cancelled:
+            return '<LazyResponse[Cancelled]>'
         return self.response.__repr__() if self.complete else '<LazyResponse[Pending]>'
 
     def _send(self):
-        super().send()
-        self.complete = True
+        try:
+            if self.cancelled:
+                return
+            super().send()
+            if self.cancelled:
+                # abandoned while in flight
+                self.response = None
+                return
+            self.complete = True
+        finally:
+            # return the session to the pool, even if the request was never sent
+            self.close_session()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        '''
+        Wait up to `timeout` seconds for the response. Returns True if it is ready.
+        '''
+        if not self.cancelled:
+            futures_wait((self._future,), timeout)
+        return self.complete
 
     def join(self):
-        if isinstance(self._thread, Future):
-            # await future to be ready
-            futures_wait((self._thread,))
-        else:
-            # await thread to be ready
-            self._thread.join()
+        # await future to be ready
+        self.wait()
+
+    def cancel(self) -> bool:
+        '''
+        Cancel the request. Queued requests are never sent, and requests in flight are abandoned
+        (the bridge finishes them in the background, and the response is discarded).
+        Returns False if the response was already received.
+        '''
+        if self.complete:
+            return False
+        self.cancelled = True
+        if self._future.cancel():
+            # cancelled while queued, _send never runs
+            self.close_session()
+        return True
 
     def __getattr__(self, name: str):
-        # if an attribute is called, JOIN the greenlet and continue
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if self.cancelled:
+            raise CancelledError('The request was cancelled')
+        # if an attribute is called, JOIN the thread and continue
         if not self.complete:
             self.join()
+            # raised by the request
+            if (exception := self._future.exception()) is not None:
+                raise exception
         return getattr(self.response, name)
 
 
@@ -195,12 +288,8 @@ def request_list(
     '''
     # if wait is False, return a tuple of LazyTLSRequests
     if kwargs.pop('nohup', None):
-        executor = ThreadPoolExecutor()
         # return a list of LazyTLSRequests objs
-        return [
-            LazyTLSRequest(method, u, *args, **kwargs, executor=executor, raise_exception=False)
-            for u in url
-        ]
+        return [LazyTLSRequest(method, u, *args, **kwargs, raise_exception=False) for u in url]
     # send requests to urls concurrently with map
     return map([async_request(method, u, *args, **kwargs) for u in url])
 
@@ -442,57 +531,44 @@ def map(
     requests: List[TLSRequest],
     size: Optional[int] = None,
     exception_handler: Optional[Callable] = None,
+    backend: Optional[str] = None,
 ):
     '''
     Concurrently converts a list of Requests to Responses.
+    Keeps `size` requests in flight, starting the next one as soon as any finishes.
 
     Parameters:
         requests - a collection of Request objects.
         size - Specifies the number of requests to make at a time. If None, no throttling occurs.
+            BridgeConfig.concurrency (the connections to the bridge) is raised to match.
         exception_handler - Callback function, called when exception occurred. Params: Request, Exception
+        backend - Concurrency backend [gevent, threads, asyncio]. Defaults to backends.DEFAULT_BACKEND.
 
     Returns:
-        A list of Response objects.
+        A list of Response objects, in the order of the requests.
     '''
 
     requests = list(requests)
-    all_resps: List[Optional[Response]] = []
-
-    if size is None:
-        # set default increment size to the total
-        size = len(requests)
-
-    for inc in range(0, len(requests), size):
-        processed_reqs= []
-        requests_range = requests[inc : min(inc + size, len(requests))]
-        for req in requests_range:
-            # prepare the request & construct sessions
-            if req.session is None:
-                req._build_session()
-            # create a list of ProcessResponse objects
-            processed_reqs.append(
-                req.session.request(req.method, req.url, **req.kwargs, process=False)
-            )
-        try:
-            resps: List[Optional[Response]] = response.ProcessResponsePool(
-                processed_reqs
-            ).execute_pool()
-        except Exception as e:
-            # handle exception for all requests in the pool
-            failed_resp: FailedResponse = FailedResponse(e)  # create a FailedResponse object
-            resps = [failed_resp] * len(requests_range)  # add None for each failed request
-            for req in requests_range:
-                if req.raise_exception:
-                    raise e
-                req.exception = e
-                req.traceback = traceback.format_exc()
-                if exception_handler:
-                    exception_handler(req, e)
-        finally:
-            # close sessions
-            for req in requests_range:
-                req.close_session()
-        all_resps.extend(resps)
+    # all of them in flight (sizes the bridge connections, see backends)
+    size = size or len(requests)
+    all_resps: List[Union[Response, FailedResponse]] = []
+
+    sent = get_backend(backend).imap(requests, size, ordered=True)
+    try:
+        # results are yielded in input order, while the window keeps sliding
+        for req in sent:
+            if req.response is not None:
+                all_resps.append(req.response)
+                continue
+            # handle exception for the failed request only
+            if req.raise_exception:
+                raise req.exception
+            if exception_handler:
+                exception_handler(req, req.exception)
+            all_resps.append(FailedResponse(req.exception))
+    finally:
+        # stop requests still in flight if a failure was raised
+        sent.close()
     return all_resps
 
 
@@ -501,6 +577,7 @@ def imap(
     size: int = 2,
     enumerate: bool = False,
     exception_handler: Optional[Callable] = None,
+    backend: Optional[str] = None,
 ):
     '''
     Concurrently converts a generator object of Requests to a generator of Responses.
@@ -509,20 +586,22 @@ def imap(
         requests - a generator or sequence of Request objects.
         size - Specifies the number of requests to make at a time. default is 2
         exception_handler - Callback function, called when exception occurred. Params: Request, Exception
+        backend - Concurrency backend [gevent, threads, asyncio]. Defaults to backends.DEFAULT_BACKEND.
 
     Yields:
         Response objects.
     '''
     if enumerate:  # send to imap_enum
-        return imap_enum(requests, size, exception_handler)
+        return imap_enum(requests, size, exception_handler, backend)
+    return _imap(requests, size, exception_handler, backend)
 
-    def send(r):
-        return r.send()
 
-    pool = Pool(size)
-    for request in pool.imap_unordered(send, requests):
+def _imap(requests, size, exception_handler, backend):
+    for request in get_backend(backend).imap(requests, size, ordered=False):
         if request.response is not None:
             yield request.response
+        elif request.raise_exception:
+            raise request.exception
         elif exception_handler:
             ex_result = exception_handler(request, request.exception)
             if ex_result is not None:
@@ -530,13 +609,12 @@ def imap(
         else:
             yield FailedResponse(request.exception)
 
-    pool.join()
-
 
 def imap_enum(
     requests: List[TLSRequest],
     size: int = 2,
     exception_handler: Optional[Callable] = None,
+    backend: Optional[str] = None,
 ):
     '''
     Like imap, but yields tuple of original request index and response object
@@ -548,24 +626,96 @@ def imap_enum(
         requests - a sequence of Request objects.
         size - Specifies the number of requests to make at a time. default is 2
         exception_handler - Callback function, called when exception occurred. Params: Request, Exception
+        backend - Concurrency backend [gevent, threads, asyncio]. Defaults to backends.DEFAULT_BACKEND.
 
     Yields:
         (index, Response) tuples.
     '''
-
-    def send(r):
-        return r._index, r.send()
-
     requests = list(requests)
     for index, req in enumerate(requests):
         req._index = index
 
-    pool = Pool(size)
-    for index, request in pool.imap_unordered(send, requests):
+    for request in get_backend(backend).imap(requests, size, ordered=False):
         if request.response is not None:
-            yield index, request.response
+            yield request._index, request.response
+        elif request.raise_exception:
+            raise request.exception
         elif exception_handler:
             ex_result = exception_handler(request, request.exception)
-            yield index, ex_result
+            yield request._index, ex_result
         else:
-            yield index, FailedResponse(request.exception)
+            yield request._index, FailedResponse(request.exception)
+
+
+def imap_batch(
+    requests: List[TLSRequest],
+    size: Optional[int] = None,
+    enumerate: bool = False,
+    exception_handler: Optional[Callable] = None,
+):
+    '''
+    Sends Requests in batches of `size`, and yields each Response as soon as it completes.
+    Responses are in arbitrary order.
+    Bridges without /multistream yield the Responses of a batch once it completes.
+
+    Parameters:
+        requests - a collection of Request objects.
+        size - Specifies the number of requests per batch. If None, all requests are sent at once.
+        enumerate - Yield (index, Response) tuples instead of Responses.
+        exception_handler - Callback function, called when exception occurred. Params: Request, Exception
+
+    Yields:
+        Response objects, or (index, Response) tuples.
+    '''
+    requests = list(requests)
+    size = size or len(requests)
+
+    for inc in range(0, len(requests), size):
+        requests_range = requests[inc : inc + size]
+        pending: set = set(range(len(requests_range)))
+        try:
+            processed_reqs = []
+            for req in requests_range:
+                # prepare the request & construct sessions
+                if req.session is None:
+                    req._build_session()
+                processed_reqs.append(
+                    req.session.request(req.method, req.url, **req.kwargs, process=False)
+                )
+            for index, resp in response.ProcessResponsePool(processed_reqs).iter_pool():
+                pending.discard(index)
+                req = requests_range[index]
+                if isinstance(resp, Exception):
+                    if req.raise_exception:
+                        # stop the whole generator, not just the batch
+                        pending.clear()
+                    # only this request failed
+                    resp = _fail_request(req, resp, exception_handler)
+                else:
+                    req.response = resp
+                yield (inc + index, resp) if enumerate else resp
+        except Exception as e:
+            if not pending:
+                # raised by a request itself
+                raise
+            # fail the requests of the batch that didn't complete
+            for index in sorted(pending):
+                failed_resp = _fail_request(requests_range[index], e, exception_handler)
+                yield (inc + index, failed_resp) if enumerate else failed_resp
+        finally:
+            # close sessions
+            for req in requests_range:
+                req.close_session()
+
+
+def _fail_request(
+    req: TLSRequest, e: Exception, exception_handler: Optional[Callable]
+) -> FailedResponse:
+    # record a request's failure, raising it if the request should raise
+    if req.raise_exception:
+        raise e
+    req.exception = e
+    req.traceback = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
+    if exception_handler:
+        exception_handler(req, e)
+    return FailedResponse(e)
@@ -1,22 +1,20 @@
+import codecs
 import json
 
-from requests.utils import get_encoding_from_headers
 import re
-from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import partial
 from http.client import responses as status_codes
-from typing import List, Literal, Optional, Union
+from typing import BinaryIO, Iterator, List, Literal, Optional, Tuple, Union
 
-from json import dumps, loads
-from requests.exceptions import HTTPError
+from json import loads
 
 
-from . import client
-from .cffi import library
+from . import bridge, client, framing, json_codec
 from .exceptions import ClientException
 
 from .cookies import RequestsCookieJar
-from .toolbelt import CaseInsensitiveDict, FileUtils
+from .toolbelt import CaseInsensitiveDict, FileUtils, get_encoding_from_headers
 
 try:
     import turbob64 as base64
@@ -32,11 +30,14 @@ class ProcessResponse:
         url: str,
         files: Optional[dict] = None,
         cookies: Optional[Union[RequestsCookieJar, dict, list]] = None,
+        stream: bool = False,
         **kwargs,
     ) -> None:
         self.session= session
         self.method: str = method
         self.url: str = url
+        # read the response body incrementally (not supported in pools)
+        self.stream: bool = stream
 
         if files:
             data = kwargs['data']
@@ -70,6 +71,7 @@ class ProcessResponse:
                 method=self.method,
                 url=self.url,
                 cookies=self.cookies,
+                stream=self.stream,
                 **self.kwargs,
             )
         except ClientException as e:
@@ -80,6 +82,25 @@ class ProcessResponse:
         resp.browser = self.session.browser
         return resp
 
+    async def asend(self) -> None:
+        # like send, on the running asyncio event loop
+        time: datetime = datetime.now()
+        try:
+            resp = await self.session.execute_request_async(
+                method=self.method,
+                url=self.url,
+                cookies=self.cookies,
+                **self.kwargs,
+            )
+        except ClientException as e:
+            raise e
+        except IOError as e:
+            raise ClientException('Connection error') from e
+        resp.session = None if self.session.temp else self.session
+        resp.browser = self.session.browser
+        resp.elapsed = datetime.now() - time
+        self.response = resp
+
 
 class ProcessResponsePool:
     '''
@@ -89,34 +110,118 @@ class ProcessResponsePool:
     def __init__(self, pool: List[ProcessResponse]) -> None:
         self.pool: List[ProcessResponse] = pool
 
-    def execute_pool(self) -> List['Response']:
+    def build_payloads(self) -> list:
+        '''
+        Build the payload of each request.
+        Requests that fail to build (e.g. invalid proxy) get None, and keep their exception.
+        '''
         values: list = []
         for proc in self.pool:
             # get the request data
-            payload, headers = proc.session.build_request(
-                method=proc.method,
-                url=proc.url,
-                cookies=proc.cookies,
-                **proc.kwargs,
-            )
+            try:
+                payload, headers = proc.session.build_request(
+                    method=proc.method,
+                    url=proc.url,
+                    cookies=proc.cookies,
+                    **proc.kwargs,
+                )
+            except Exception as e:
+                # fail this request only
+                proc.exception = e
+                values.append(None)
+                continue
+            proc.exception = None
             # remember full set of headers (including from session)
             proc.full_headers = headers
+            proc.proxy = payload['proxyUrl']
             # add to values
             values.append(payload)
+        return values
+
+    def build_result(self, index: int, data: dict) -> Union['Response', Exception]:
+        # build the response of one request, or return its error (e.g. a failed bridge request)
+        proc = self.pool[index]
+        try:
+            return proc.session.build_response(proc.url, proc.full_headers, data, proc.proxy)
+        except Exception as e:
+            return e
+
+    def execute_pool(self) -> List[Union['Response', Exception]]:
+        '''
+        Send the requests in one batch.
+        Returns a Response for each request, or the exception that failed it
+        (a ClientException for each request the bridge didn't answer).
+        Raises ClientException if the batch can't be sent.
+        '''
+        values: list = self.build_payloads()
+        results: list = [proc.exception for proc in self.pool]
+        # indexes of the requests that were built
+        sent: List[int] = [index for index, payload in enumerate(values) if payload is not None]
+        if not sent:
+            return results
         # execute the pool
         try:
             # send request
-            resp = proc.session.server.post(
-                f'http://127.0.0.1:{library.PORT}/multirequest', body=dumps(values)
+            response_object = self.pool[sent[0]].session.send_payload(
+                '/multirequest', [values[index] for index in sent]
             )
-            response_object = loads(resp.read())
         except Exception as e:
             raise ClientException('Connection error') from e
+        replies: list = response_object if isinstance(response_object, list) else []
         # process responses
-        return [
-            proc.session.build_response(proc.url, proc.full_headers, data, payload['proxyUrl'])
-            for proc, data in zip(self.pool, response_object)
-        ]
+        for position, index in enumerate(sent):
+            if position < len(replies):
+                results[index] = self.build_result(index, replies[position])
+            else:
+                # the bridge didn't answer this request (a short or non-list reply)
+                results[index] = ClientException(
+                    f'Unexpected /multirequest reply for {len(sent)} requests: '
+                    f'{str(response_object)[:200]}'
+                )
+        return results
+
+    def iter_pool(self) -> Iterator[Tuple[int, Union['Response', Exception]]]:
+        '''
+        Like execute_pool, but yields (index, Response or exception) as each request completes,
+        instead of waiting for the whole batch.
+        Bridges without /multistream send the batch to /multirequest, and every result
+        is yielded once the whole batch completes.
+        '''
+        if not bridge.supports_stream():
+            yield from enumerate(self.execute_pool())
+            return
+        values: list = self.build_payloads()
+        for index, proc in enumerate(self.pool):
+            if proc.exception is not None:
+                yield index, proc.exception
+        sent: List[int] = [index for index, payload in enumerate(values) if payload is not None]
+        if not sent:
+            return
+        session = self.pool[sent[0]].session
+        try:
+            fp = session.server.open(
+                '/multistream', session.encode_payload([values[index] for index in sent])
+            )
+        except Exception as e:
+            raise ClientException('Connection error') from e
+        try:
+            for _ in range(len(sent)):
+                try:
+                    data = framing.read_frame(fp)
+                except Exception as e:
+                    raise ClientException('Connection error') from e
+                if data is None:
+                    raise ClientException('Bridge reply ended unexpectedly')
+                if 'index' not in data:
+                    # the whole batch failed
+                    raise ClientException(data.get('body') or 'Connection error')
+                # the bridge indexes the requests that were sent
+                index: int = sent[data['index']]
+                yield index, self.build_result(index, data)
+        finally:
+            fp.close()
+
+
 def extract_next_data(html_string):
     from bs4 import BeautifulSoup
 
@@ -136,13 +241,45 @@ def extract_next_page_props(html_string):
     return next_data
 
 
-@dataclass
+class StreamBody:
+    '''
+    File-like response body, read incrementally from the bridge
+    '''
+
+    def __init__(self, fp: BinaryIO) -> None:
+        self.fp: BinaryIO = fp
+        self.closed: bool = False
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        if self.closed:
+            return b''
+        if size is None or size < 0:
+            data = self.fp.read()
+            self.close()
+            return data
+        data = self.fp.read(size)
+        if not data:
+            self.close()
+        return data
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter(partial(self.read, 8192), b'')
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.fp.close()
+
+
 class Response:
     """
     Response object
 
     Methods:
         json: Returns the response body as json
+        iter_content: Iterates over the response body in chunks
+        iter_lines: Iterates over the response body line by line
+        close: Releases the connection of a streamed response
         render: Renders the response body with BrowserSession
         find: Shortcut to .html.find
 
@@ -153,45 +290,204 @@ class Response:
         headers (CaseInsensitiveDict): Response headers
         cookies (RequestsCookieJar): Response cookies
         text (str): Response body as text
-        content (Union[str, bytes]): Response body as bytes or str
+        content (bytes): Response body as bytes
+        content_view (memoryview): Read-only view of the response body bytes, without copying them
+        raw (Union[str, bytes, StreamBody]): Response body, or a StreamBody if requested with stream=True
         ok (bool): True if status code is less than 400
         elapsed (datetime.timedelta): Time elapsed between sending the request and receiving the response
+        history (List[Response]): Redirect responses leading to this one, if requested with history=True
         html (parser.HTML): Response body as HTML parser object
+
+    Responses built from the bridge's replies keep the reply's headers, and only build
+    headers, encoding and history when they are first accessed.
     """
 
-    url: str
-    status_code: int
-    headers: 'client.CaseInsensitiveDict'
-    cookies: RequestsCookieJar
-    raw: Union[str, bytes] = None
-
-    # set by ProcessResponse
-    history: Optional[List['Response']] = None
-    session= None
-    browser: Optional[Literal['firefox', 'chrome']] = None
-    elapsed: Optional[timedelta] = None
-    encoding: str = 'UTF-8'
-    is_utf8: bool = True
-    proxy: Optional[str] = None
-
-    def __post_init__(self) -> None:
-        self.encoding = get_encoding_from_headers(self.headers) or 'utf-8'
-        
+    __slots__ = (
+        'url',
+        'status_code',
+        'cookies',
+        'raw',
+        'session',
+        'browser',
+        'elapsed',
+        'is_utf8',
+        'proxy',
+        '_headers',
+        '_reply_headers',
+        '_encoding',
+        '_history',
+        '_hops',
+        '_converted',
+    )
+
+    def __init__(
+        self,
+        url: str,
+        status_code: int,
+        headers: Optional['client.CaseInsensitiveDict'],
+        cookies: RequestsCookieJar,
+        raw: Union[str, bytes, StreamBody] = None,
+        # set by ProcessResponse
+        history: Optional[List['Response']] = None,
+        session=None,
+        browser: Optional[Literal['firefox', 'chrome']] = None,
+        elapsed: Optional[timedelta] = None,
+        encoding: Optional[str] = None,
+        is_utf8: bool = True,
+        proxy: Optional[str] = None,
+    ) -> None:
+        self.url: str = url
+        self.status_code: int = status_code
+        self.cookies: RequestsCookieJar = cookies
+        self.raw: Union[str, bytes, StreamBody] = raw
+        self.session = session
+        self.browser: Optional[Literal['firefox', 'chrome']] = browser
+        self.elapsed: Optional[timedelta] = elapsed
+        self.is_utf8: bool = is_utf8
+        self.proxy: Optional[str] = proxy
+        self._headers: Optional['client.CaseInsensitiveDict'] = headers
+        # headers of the bridge's reply ({name: [values]}), built into self.headers when accessed
+        self._reply_headers: Optional[dict] = None
+        # detected from the headers when accessed
+        self._encoding: Optional[str] = encoding
+        self._history: Optional[List['Response']] = history
+        # redirect responses as (reply, cookies) pairs, built into self.history when accessed
+        self._hops: Optional[list] = None
+        # raw body converted to the other type (bytes <-> str), as (raw, encoding, converted body)
+        self._converted: Optional[tuple] = None
+
+    @property
+    def headers(self) -> 'client.CaseInsensitiveDict':
+        if self._headers is None:
+            # unwrap single values
+            self._headers = client.CaseInsensitiveDict.from_lists(self._reply_headers or {})
+            self._reply_headers = None
+        return self._headers
+
+    @headers.setter
+    def headers(self, headers: 'client.CaseInsensitiveDict') -> None:
+        self._headers = headers
+        self._reply_headers = None
+
+    @property
+    def encoding(self) -> str:
+        if self._encoding is None:
+            if self._headers is None and self._reply_headers:
+                # find the content type without building the headers
+                headers: dict = {
+                    'content-type': values[0]
+                    for key, values in self._reply_headers.items()
+                    if values and key.lower() == 'content-type'
+                }
+            else:
+                headers = self.headers
+            self._encoding = get_encoding_from_headers(headers) or 'utf-8'
+        return self._encoding
+
+    @encoding.setter
+    def encoding(self, encoding: str) -> None:
+        self._encoding = encoding
+
+    @property
+    def history(self) -> Optional[List['Response']]:
+        if self._hops is not None:
+            self._history = [build_response(reply, cookies, self.proxy) for reply, cookies in self._hops]
+            self._hops = None
+        return self._history
+
+    @history.setter
+    def history(self, history: Optional[List['Response']]) -> None:
+        self._history = history
+        self._hops = None
+
     @property
     def reason(self) -> str:
         return status_codes[self.status_code]
 
     def json(self, **kwargs) -> Union[dict, list]:
-        return loads(self.content, **kwargs)
+        if kwargs:
+            # decoding options of the json module
+            return loads(self.content, **kwargs)
+        # decoded bodies are parsed as they are, without encoding them back
+        return json_codec.loads(self.raw if type(self.raw) is str else self.content)
 
     @property
     def content(self) -> bytes:
-        # note: this will convert the content to bytes on each access
-        return self.raw if type(self.raw) is bytes else self.raw.encode(self.encoding)
+        if isinstance(self.raw, StreamBody):
+            # read the rest of a streamed body
+            self.raw = self.raw.read()
+        return self.raw if type(self.raw) is bytes else self._convert()
+
+    @property
+    def content_view(self) -> memoryview:
+        return memoryview(self.content)
 
     @property
     def text(self) -> str:
-        return self.raw if type(self.raw) is str else self.raw.decode(self.encoding)
+        if isinstance(self.raw, StreamBody):
+            self.raw = self.raw.read()
+        return self.raw if type(self.raw) is str else self._convert()
+
+    def _convert(self) -> Union[str, bytes]:
+        # encode a str body / decode a bytes body once, again only if raw or encoding change
+        raw = self.raw
+        converted = self._converted
+        if converted is not None and converted[0] is raw and converted[1] == self.encoding:
+            return converted[2]
+        body = raw.encode(self.encoding) if type(raw) is str else raw.decode(self.encoding)
+        self._converted = (raw, self.encoding, body)
+        return body
+
+    def iter_content(
+        self, chunk_size: Optional[int] = 1, decode_unicode: bool = False
+    ) -> Iterator[Union[bytes, str]]:
+        '''
+        Iterates over the response body in chunks of `chunk_size` bytes.
+        Streamed bodies are read from the bridge as they are consumed.
+        '''
+        if isinstance(self.raw, StreamBody):
+            chunks = iter(partial(self.raw.read, chunk_size or -1), b'')
+        else:
+            content = self.content
+            chunk_size = chunk_size or len(content) or 1
+            chunks = (content[i : i + chunk_size] for i in range(0, len(content), chunk_size))
+        if not decode_unicode:
+            yield from chunks
+            return
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+        for chunk in chunks:
+            if text := decoder.decode(chunk):
+                yield text
+        if text := decoder.decode(b'', final=True):
+            yield text
+
+    def iter_lines(
+        self,
+        chunk_size: Optional[int] = 512,
+        decode_unicode: bool = False,
+        delimiter: Optional[Union[str, bytes]] = None,
+    ) -> Iterator[Union[bytes, str]]:
+        '''
+        Iterates over the response body one line at a time
+        '''
+        pending = None
+        for chunk in self.iter_content(chunk_size=chunk_size, decode_unicode=decode_unicode):
+            if pending is not None:
+                chunk = pending + chunk
+            lines = chunk.split(delimiter) if delimiter else chunk.splitlines()
+            # the last line may continue in the next chunk
+            if lines and lines[-1] and chunk and lines[-1][-1] == chunk[-1]:
+                pending = lines.pop()
+            else:
+                pending = None
+            yield from lines
+        if pending is not None:
+            yield pending
+
+    def close(self) -> None:
+        '''Releases the connection of a streamed response'''
+        if isinstance(self.raw, StreamBody):
+            self.raw.close()
 
 
     @property
@@ -237,6 +533,7 @@ class Response:
             raise ValueError("Content Type must be HTML")        
     def raise_for_status(self):
         """Raises :class:`HTTPError`, if one occurred."""
+        from requests.exceptions import HTTPError
 
         http_error_msg = ""
         if isinstance(self.reason, bytes):
@@ -267,6 +564,9 @@ class Response:
     def __enter__(self):
         return self
 
+    def __exit__(self, *_):
+        self.close()
+
     def __repr__(self):
         return f"<Response [{self.status_code}]>"
 
@@ -301,33 +601,34 @@ def parse_header_links(value):
 
 
 def build_response(
-    res: Union[dict, list], res_cookies: RequestsCookieJar, proxy: Optional[str]
+    res: Union[dict, list],
+    res_cookies: RequestsCookieJar,
+    proxy: Optional[str],
+    hops: Optional[list] = None,
 ) -> Response:
-    '''Builds a Response object'''
-    # build headers
-    if res["headers"] is None:
-        res_headers = {}
-    else:
-        res_headers = {
-            header_key: header_value[0] if len(header_value) == 1 else header_value
-            for header_key, header_value in res["headers"].items()
-        }
-    # decode bytes response
-    if res.get('isBase64'):
+    '''
+    Builds a Response object.
+    hops are the redirect responses leading to it, as (reply, cookies) pairs
+    '''
+    # decode bytes response (binary framed bodies are already bytes)
+    if res.get('isBase64') and isinstance(res.get('body'), str):
         res['body'] = base64.b64decode(res['body'].encode())
-    return Response(
+    resp = Response(
         # add target / url
         url=res["target"],
         # add status code
         status_code=res["status"],
-        # add headers
-        headers=client.CaseInsensitiveDict(res_headers),
+        # headers are built when accessed
+        headers=None,
         # add cookies
         cookies=res_cookies,
         # add response body
-        raw=res["body"],
+        raw=res.get("body"),
         # if response was utf-8 validated
         is_utf8=not res.get('isBase64'),
         # add proxy
         proxy=proxy,
     )
+    resp._reply_headers = res["headers"]
+    resp._hops = hops
+    return resp
@@ -1,14 +1,20 @@
+from collections import OrderedDict
+from os import getenv
 from functools import partial
 from random import choice as rchoice
 from sys import modules, stderr
-from typing import Literal, Optional, Tuple, Union
+from threading import Lock
+from time import monotonic
+from typing import Callable, Dict, List, Literal, Optional, Tuple, Union
+from urllib.parse import urlencode, urlparse
 
 import botasaurus_requests
 from .headers import Headers
 from .response import ProcessResponse
 
-from .client import TLSClient
-from .cookies import RequestsCookieJar
+from .client import TLSClient, verify_proxy
+from .cookies import RequestsCookieJar, domain_match
+from .json_codec import dumps
 from .toolbelt import CaseInsensitiveDict
 
 
@@ -33,6 +39,9 @@ class TLSSession(TLSClient):
         force_http1 (bool, optional): Force HTTP/1. Defaults to False.
         catch_panics (bool, optional): Catch panics. Defaults to False.
         debug (bool, optional): Debug mode. Defaults to False.
+        transport (str, optional): Bridge transport [http, unix, cgo]. Defaults to $BOTASAURUS_REQUESTS_TRANSPORT or http.
+        server_cookies (bool, optional): Keep the cookie jar in the bridge, and only sync changed cookies. Defaults to False.
+        history_bodies (bool, optional): Keep the bodies of redirect responses in history. Defaults to True.
 
     Methods:
         get(url, *, params=None, headers=None, cookies=None, allow_redirects=True, verify=None, timeout=30, proxy=None):
@@ -49,6 +58,8 @@ class TLSSession(TLSClient):
             Send a PATCH request
         delete(url, *, params=None, headers=None, cookies=None, allow_redirects=True, verify=None, timeout=30, proxy=None):
             Send a DELETE request
+        prepare(method, *, headers=None, allow_redirects=True, history=False, verify=None, timeout=None, proxy=None):
+            Prepare a request sent repeatedly to varying URLs, see PreparedRequest
         render(url, headless, proxy, response, mock_human):
             Render a page with playwright
     """
@@ -146,6 +157,7 @@ class TLSSession(TLSClient):
         timeout: Optional[float] = None,
         proxy: Optional[str] = None,
         proxies: Optional[dict] = None,  # backwards compatibility
+        stream: bool = False,
         process: bool = True,
     ) -> 'botasaurus_requests.response.Response':
         """
@@ -164,6 +176,7 @@ class TLSSession(TLSClient):
             verify (bool, optional): Verify the server's TLS certificate. Defaults to True.
             timeout (float, optional): Timeout in seconds. Defaults to 30.
             proxy (str, optional): Proxy URL. Defaults to None.
+            stream (bool, optional): Read the response body incrementally with `iter_content`, `iter_lines` or `raw.read`. Defaults to False.
 
         Returns:
             response.Response: Response object
@@ -185,6 +198,7 @@ class TLSSession(TLSClient):
             verify=self.verify if verify is None else verify,
             timeout=self.timeout if timeout is None else timeout,
             proxy=proxy,
+            stream=stream,
         )
         if not process:
             # return an unfinished ProcessResponse object
@@ -192,6 +206,43 @@ class TLSSession(TLSClient):
         proc.send()
         return proc.response
 
+    def prepare(
+        self,
+        method: str,
+        *,
+        headers: Optional[Union[dict, CaseInsensitiveDict]] = None,
+        allow_redirects: bool = True,
+        history: bool = False,
+        verify: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        proxy: Optional[str] = None,
+    ) -> 'PreparedRequest':
+        """
+        Prepare a request sent repeatedly, where only the URL, params or body change
+
+        Args:
+            method (str): Method of request (GET, POST, OPTIONS, HEAD, PUT, PATCH, DELETE)
+            headers (dict, optional): Dictionary of HTTP headers to send with the request, merged with the session's. Defaults to None.
+            allow_redirects (bool, optional): Allow request to redirect. Defaults to True.
+            history (bool, optional): Remember request history. Defaults to False.
+            verify (bool, optional): Verify the server's TLS certificate. Defaults to the session's.
+            timeout (float, optional): Timeout in seconds. Defaults to the session's.
+            proxy (str, optional): Proxy URL. Defaults to the session's.
+
+        Returns:
+            PreparedRequest: send it with .send(url, params=None, data=None, json=None)
+        """
+        return PreparedRequest(
+            session=self,
+            method=method,
+            headers=headers,
+            allow_redirects=allow_redirects,
+            history=history,
+            verify=self.verify if verify is None else verify,
+            timeout=self.timeout if timeout is None else timeout,
+            proxy=proxy,
+        )
+
 
 class Session(TLSSession):
     def __init__(
@@ -219,6 +270,9 @@ class Session(TLSSession):
             force_http1 (bool, optional): Force HTTP/1. Defaults to False.
             catch_panics (bool, optional): Catch panics. Defaults to False.
             debug (bool, optional): Debug mode. Defaults to False.
+            transport (str, optional): Bridge transport [http, unix, cgo]. Defaults to $BOTASAURUS_REQUESTS_TRANSPORT or http.
+            server_cookies (bool, optional): Keep the cookie jar in the bridge, and only sync changed cookies. Defaults to False.
+            history_bodies (bool, optional): Keep the bodies of redirect responses in history. Defaults to True.
         '''
         # random version if not specified
         if not version:
@@ -240,6 +294,114 @@ class Session(TLSSession):
         )
 
 
+class PreparedRequest:
+    """
+    A request with a fixed method, headers and options, sent repeatedly with a varying
+    URL, params or body. Created with session.prepare.
+
+    Its headers are merged with the session's, and its payload fields JSON encoded, once:
+    again only when the session's profile attributes or headers change.
+
+    Example:
+        fetch = session.prepare('GET', headers={'Accept': 'application/json'})
+        for url in urls:
+            resp = fetch.send(url, params={'page': 1})
+    """
+
+    def __init__(
+        self,
+        session: TLSSession,
+        method: str,
+        headers: Optional[Union[dict, CaseInsensitiveDict]],
+        allow_redirects: bool,
+        history: bool,
+        verify: bool,
+        timeout: float,
+        proxy: Optional[str],
+    ) -> None:
+        self.session: TLSSession = session
+        self.method: str = method
+        self.headers: Optional[CaseInsensitiveDict] = (
+            None if headers is None else CaseInsensitiveDict(headers)
+        )
+        self.allow_redirects: bool = allow_redirects
+        self.history: bool = history
+        self.verify: bool = verify
+        self.timeout: float = timeout
+        self.proxy: Optional[str] = proxy
+        if proxy:
+            verify_proxy(proxy)
+        # (session state it was built from, merged headers, fields, encoded fields)
+        self._static: Optional[tuple] = None
+
+    def static_payload(self) -> Tuple[CaseInsensitiveDict, dict, bytes]:
+        """
+        Return the merged headers, and the static payload fields with their JSON encoding
+        (see TLSClient.static_payload), including the headers and options of this request
+        """
+        session: TLSSession = self.session
+        session_fields, session_json = session.static_payload()
+        state: tuple = (session_json, session.headers, getattr(session.headers, '_version', None))
+        if self._static is not None and self._static[0] == state and state[2] is not None:
+            return self._static[1:]
+
+        # merge the headers like TLSClient.build_request
+        headers: CaseInsensitiveDict = session.headers
+        if not isinstance(headers, CaseInsensitiveDict):
+            headers = CaseInsensitiveDict(headers)
+        headers = headers.merge(self.headers)
+        fields: dict = {
+            'headers': headers.to_dict(),
+            'followRedirects': self.allow_redirects,
+            'wantHistory': self.history,
+            'insecureSkipVerify': not self.verify,
+            'requestMethod': self.method,
+            'timeoutMilliseconds': int(self.timeout * 1000),
+        }
+        encoded: bytes = session_json + b',' + dumps(fields)[1:-1]
+        self._static = (state, headers, {**session_fields, **fields}, encoded)
+        return self._static[1:]
+
+    def send(
+        self,
+        url: str,
+        *,
+        params: Optional[dict] = None,
+        data: Optional[Union[str, bytes, bytearray, dict]] = None,
+        json: Optional[Union[dict, list, str]] = None,
+    ) -> 'botasaurus_requests.response.Response':
+        """
+        Send the request to a URL
+
+        Args:
+            url (str): URL to send request to
+            params (dict, optional): Dictionary of URL parameters to append to the URL. Defaults to None.
+            data (Union[str, bytes, bytearray, dict], optional): Data to send to request. Defaults to None.
+            json (dict, optional): Json to send in the request body. Defaults to None.
+
+        Returns:
+            response.Response: Response object
+        """
+        if params is not None:
+            url = f'{url}?{urlencode(params, doseq=True)}'
+        proc = ProcessResponse(
+            session=self.session,
+            method=self.method,
+            url=url,
+            data=data,
+            headers=None,
+            json=json,
+            allow_redirects=self.allow_redirects,
+            history=self.history,
+            verify=self.verify,
+            timeout=self.timeout,
+            proxy=self.proxy,
+            prepared=self,
+        )
+        proc.send()
+        return proc.response
+
+
 class SessionShortcut:
     name: str
     versions: Tuple[int]
@@ -287,4 +449,137 @@ class chrome(SessionShortcut):
 
 
 _browsers: dict = {'firefox': firefox, 'chrome': chrome}
-_os_set: set = {'win', 'mac', 'lin'}
\ No newline at end of file
+_os_set: set = {'win', 'mac', 'lin'}
+
+
+class SessionPool:
+    '''
+    Warm temporary sessions for module-level requests (get, post, Request, ...).
+
+    Sessions are keyed by their options and the requested host, so sequential
+    requests to the same host reuse the bridge session and its open connections
+    instead of paying for a new TLS handshake every time.
+
+    Returned sessions are reset: their cookies are cleared (from the bridge's jar
+    on the next request) and their headers restored. Sessions holding cookies that
+    can't be cleared that way (e.g. set by a redirect to another host) are closed.
+    Sessions that followed redirects without history get a new bridge session, as the
+    bridge's jar may hold cookies set by the redirects.
+
+    Idle sessions are closed once expired (swept across all keys whenever a session is
+    borrowed or returned), or when more than max_sessions are idle (least recently
+    returned first).
+
+    Args:
+        max_idle (int): Idle sessions kept per key. 0 disables pooling.
+        idle_timeout (float): Seconds an idle session is kept before being closed.
+        max_sessions (int): Idle sessions kept in total.
+    '''
+
+    def __init__(self, max_idle: int = 4, idle_timeout: float = 60, max_sessions: int = 64) -> None:
+        self.max_idle: int = max_idle
+        self.idle_timeout: float = idle_timeout
+        self.max_sessions: int = max_sessions
+        # key -> idle sessions, most recently released last
+        self._idle: Dict[tuple, List[TLSSession]] = {}
+        # id(session) -> (released at, key, session), least recently released first
+        self._lru: 'OrderedDict[int, Tuple[float, tuple, TLSSession]]' = OrderedDict()
+        self._lock: Lock = Lock()
+
+    @staticmethod
+    def make_key(url: str, sess_kwargs: Optional[dict]) -> tuple:
+        # session options may hold unhashable values (h2_settings, header_order, ...)
+        options = repr(sorted((sess_kwargs or {}).items()))
+        return (urlparse(url).hostname or '').lower(), options
+
+    def _evict(self, now: float) -> List[TLSSession]:
+        # pop the expired idle sessions of every key, and the least recently released ones
+        # over max_sessions (called with the lock held, the sessions are closed after)
+        evicted: List[TLSSession] = []
+        while self._lru:
+            released, key, session = next(iter(self._lru.values()))
+            if now - released < self.idle_timeout and len(self._lru) <= self.max_sessions:
+                break
+            del self._lru[id(session)]
+            idle = self._idle[key]
+            idle[:] = [other for other in idle if other is not session]
+            if not idle:
+                del self._idle[key]
+            evicted.append(session)
+        return evicted
+
+    def acquire(self, key: tuple, factory: Callable[[], TLSSession]) -> TLSSession:
+        '''
+        Borrow an idle session for `key`, or create one with `factory`
+        '''
+        session = None
+        with self._lock:
+            evicted = self._evict(monotonic())
+            idle = self._idle.get(key)
+            if idle:
+                session = idle.pop()
+                del self._lru[id(session)]
+                if not idle:
+                    del self._idle[key]
+        for candidate in evicted:
+            candidate.close()
+        if session is None:
+            session = factory()
+            # headers to restore when the session is returned
+            session._pool_headers = session.headers.copy()
+        return session
+
+    def release(self, key: tuple, session: TLSSession) -> None:
+        '''
+        Return a session borrowed for `key`, or close it if it can't be reused
+        '''
+        evicted: List[TLSSession] = [session]
+        reusable: bool = (
+            self.max_idle > 0
+            and self.max_sessions > 0
+            and not session._closed
+            and self._reset(key[0], session)
+        )
+        with self._lock:
+            now: float = monotonic()
+            idle = self._idle.get(key, [])
+            if reusable and len(idle) < self.max_idle:
+                self._idle[key] = idle
+                idle.append(session)
+                self._lru[id(session)] = (now, key, session)
+                evicted = []
+            evicted += self._evict(now)
+        for candidate in evicted:
+            candidate.close()
+
+    @staticmethod
+    def _reset(host: str, session: TLSSession) -> bool:
+        if session._redirect_cookies:
+            # the bridge's jar may hold cookies the session never saw
+            session.renew_session()
+        else:
+            cookies = list(session.cookies)
+            # the bridge only accepts cookie updates for the requested host (and its parents)
+            if not all(domain_match(host, cookie.domain) for cookie in cookies):
+                return False
+            if cookies:
+                session.expire_cookies()
+        session.headers = session._pool_headers.copy()
+        return True
+
+    def clear(self) -> None:
+        '''
+        Close all idle sessions
+        '''
+        with self._lock:
+            lru, self._idle, self._lru = self._lru, {}, OrderedDict()
+        for _, _, session in lru.values():
+            session.close()
+
+
+# shared by module-level requests, disable with BOTASAURUS_REQUESTS_SESSION_POOL=0
+session_pool: SessionPool = SessionPool(
+    max_idle=int(getenv('BOTASAURUS_REQUESTS_SESSION_POOL', 4)),
+    idle_timeout=float(getenv('BOTASAURUS_REQUESTS_SESSION_IDLE_TIMEOUT', 60)),
+    max_sessions=int(getenv('BOTASAURUS_REQUESTS_SESSION_POOL_MAX', 64)),
+)
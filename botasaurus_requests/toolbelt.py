@@ -1,12 +1,23 @@
 import os
-from collections import OrderedDict
 from collections.abc import Mapping
 from dataclasses import dataclass
-from io import BufferedReader
-from typing import Any, Dict, Iterator, List, Mapping, MutableMapping, Optional, Tuple, Union
+from io import BufferedReader, TextIOBase
+from sys import intern
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
-from urllib3.fields import RequestField
-from urllib3.filepost import encode_multipart_formdata
+if TYPE_CHECKING:
+    from urllib3.fields import RequestField
 
 
 class FileUtils:
@@ -44,13 +55,16 @@ class FileUtils:
     @staticmethod
     def encode_files(
         files: Dict[str, Union[BufferedReader, tuple]], data: Optional[Union[dict, tuple]] = None
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple['MultipartEncoder', str]:
         """
         Build the body for a multipart/form-data request.
         Will encode files when passed as a dict or a list of tuples.
+        File objects are not read until the body is sent.
 
         (file_name, file_obj[, content_type[, custom_headers]])
         """
+        from urllib3.fields import RequestField
+
         fields = list(FileUtils.get_fields(data)) if data else []
 
         for k, v in FileUtils.to_items_list(files):
@@ -63,13 +77,14 @@ class FileUtils:
             else:
                 file = File(FileUtils._guess_filename(v) or k, v)
 
-            rf: RequestField = RequestField(
-                name=k, data=file.fdata, filename=file.file_name, headers=file.custom_headers
+            rf: 'RequestField' = RequestField(
+                name=k, data=file, filename=file.file_name, headers=file.custom_headers
             )
             rf.make_multipart(content_type=file.content_type)
             fields.append(rf)
 
-        return encode_multipart_formdata(fields)
+        encoder = MultipartEncoder(fields)
+        return encoder, encoder.content_type
 
 
 @dataclass
@@ -80,35 +95,171 @@ class File:
     custom_headers: Optional[dict] = None
 
     def __post_init__(self) -> None:
-        # get the file data
-        if isinstance(self.file_obj, BufferedReader):
-            self.fdata = self.file_obj.read()
-        else:
-            self.fdata = self.file_obj
+        if hasattr(self.file_obj, 'read') and not isinstance(self.file_obj, TextIOBase):
+            try:
+                # measure the rest of the file without reading it
+                self.offset: int = self.file_obj.tell()
+                self.length: int = self.file_obj.seek(0, os.SEEK_END) - self.offset
+                self.file_obj.seek(self.offset)
+                return
+            except (AttributeError, OSError):
+                pass
+        # text files and unseekable streams have to be read up front
+        if hasattr(self.file_obj, 'read'):
+            self.file_obj = self.file_obj.read()
+        if isinstance(self.file_obj, str):
+            self.file_obj = self.file_obj.encode('utf-8')
+        self.length: int = len(self.file_obj)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def iter_chunks(self, chunk_size: int) -> Iterator[bytes]:
+        if not hasattr(self.file_obj, 'read'):
+            yield self.file_obj
+            return
+        # rewind, so the body can be sent more than once
+        self.file_obj.seek(self.offset)
+        remaining: int = self.length
+        while remaining > 0:
+            chunk: bytes = self.file_obj.read(min(chunk_size, remaining))
+            if not chunk:
+                raise IOError(f'{self.file_name} ended before its measured length')
+            remaining -= len(chunk)
+            yield chunk
+
+
+class MultipartEncoder:
+    '''
+    Lazily encoded multipart/form-data body.
+    File parts are read in chunks while the body is sent, so uploads run in bounded memory.
+    '''
+
+    chunk_size: int = 64 * 1024
+
+    def __init__(
+        self, fields: List[Union['RequestField', Tuple[str, bytes]]], boundary: Optional[str] = None
+    ) -> None:
+        from urllib3.fields import RequestField
+        from urllib3.filepost import choose_boundary
+
+        self.boundary: str = boundary or choose_boundary()
+        self.content_type: str = f'multipart/form-data; boundary={self.boundary}'
+        # encoded headers and small values as bytes, files as File
+        self.parts: List[Union[bytes, File]] = []
+        for field in fields:
+            if isinstance(field, tuple):
+                field = RequestField.from_tuples(*field)
+            self.parts.append(
+                f'--{self.boundary}\r\n'.encode('latin-1') + field.render_headers().encode('utf-8')
+            )
+            data = field.data
+            if isinstance(data, int):
+                data = str(data)
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            self.parts.append(data)
+            self.parts.append(b'\r\n')
+        self.parts.append(f'--{self.boundary}--\r\n'.encode('latin-1'))
+
+    def __len__(self) -> int:
+        return sum(len(part) for part in self.parts)
+
+    def __iter__(self) -> Iterator[bytes]:
+        for part in self.parts:
+            if isinstance(part, File):
+                yield from part.iter_chunks(self.chunk_size)
+            else:
+                yield part
+
+    def to_bytes(self) -> bytes:
+        # materialize the whole body
+        return b''.join(self)
+
+
+# interned lowercase header names, by name as written (the same few names recur in every request and response)
+_lower_names: Dict[str, str] = {}
+
+
+def lower_name(name: str) -> str:
+    # lowercase a header name, interned
+    lower = _lower_names.get(name)
+    if lower is None:
+        lower = name.lower()
+        if type(lower) is str:
+            lower = intern(lower)
+            if len(_lower_names) < 4096:
+                _lower_names[name] = lower
+    return lower
 
 
 class CaseInsensitiveDict(MutableMapping):
     '''
     Origin: requests library (https://github.com/psf/requests)
     A case-insensitive ``dict``-like object.
+
+    Entries are stored as {interned lowercase name: (name, value)}.
+    Copies share their store until either is changed (copy-on-write), so layering
+    request headers over session headers (see merge) copies the session's entries
+    at most once, and to_dict serializes them for the bridge in one pass.
     '''
 
+    __slots__ = ('_store', '_shared', '_version')
+
     def __init__(self, data=None, **kwargs):
-        self._store = OrderedDict()
+        self._store: Dict[str, Tuple[str, Any]] = {}
+        # the store is shared with a copy, and must be copied before a change
+        self._shared: bool = False
+        # number of changes, to tell when a copy (e.g. an encoded payload) is out of date
+        self._version: int = 0
         if data is None:
             data = {}
         self.update(data, **kwargs)
 
+    def _own(self) -> None:
+        # copy a shared store before changing it
+        if self._shared:
+            self._store = dict(self._store)
+            self._shared = False
+
     def __setitem__(self, key, value):
         # Use the lowercased key for lookups, but store the actual
         # key alongside the value.
-        self._store[key.lower()] = (key, value)
+        self._own()
+        self._store[lower_name(key)] = (key, value)
+        self._version += 1
 
     def __getitem__(self, key):
-        return self._store[key.lower()][1]
+        return self._store[lower_name(key)][1]
 
     def __delitem__(self, key):
-        del self._store[key.lower()]
+        self._own()
+        del self._store[lower_name(key)]
+        self._version += 1
+
+    def __contains__(self, key):
+        return lower_name(key) in self._store
+
+    def get(self, key, default=None):
+        entry = self._store.get(lower_name(key))
+        return default if entry is None else entry[1]
+
+    def update(self, data=(), **kwargs):
+        if isinstance(data, CaseInsensitiveDict):
+            items = data._store.values()
+        elif isinstance(data, Mapping):
+            items = data.items()
+        elif hasattr(data, 'keys'):
+            items = ((key, data[key]) for key in data.keys())
+        else:
+            items = data
+        self._own()
+        store = self._store
+        for key, value in items:
+            store[lower_name(key)] = (key, value)
+        for key, value in kwargs.items():
+            store[lower_name(key)] = (key, value)
+        self._version += 1
 
     def __iter__(self):
         return (casedkey for casedkey, mappedvalue in self._store.values())
@@ -130,7 +281,86 @@ class CaseInsensitiveDict(MutableMapping):
 
     # Copy is required
     def copy(self):
-        return CaseInsensitiveDict(self._store.values())
+        # shares the store until either copy is changed
+        new = CaseInsensitiveDict.__new__(CaseInsensitiveDict)
+        new._store = self._store
+        new._shared = self._shared = True
+        new._version = 0
+        return new
+
+    def merge(self, overrides: Optional[Mapping]) -> 'CaseInsensitiveDict':
+        '''
+        Return a copy with `overrides` layered over these entries.
+        Entries whose value is None are removed.
+        '''
+        merged: CaseInsensitiveDict = self.copy()
+        if overrides:
+            merged.update(overrides)
+        # Remove items, where the value is set to None.
+        none_keys = [key for key, (_, value) in merged._store.items() if value is None]
+        if none_keys:
+            merged._own()
+            for key in none_keys:
+                del merged._store[key]
+        return merged
+
+    def to_dict(self) -> Dict[str, Any]:
+        '''The entries as a plain {name: value} dict, as sent to the bridge'''
+        return dict(self._store.values())
+
+    @classmethod
+    def from_lists(cls, headers: Mapping) -> 'CaseInsensitiveDict':
+        '''Build from a {name: [values]} map (as replied by the bridge), unwrapping single values'''
+        new = cls()
+        new._store = {
+            lower_name(key): (key, values[0] if len(values) == 1 else values)
+            for key, values in headers.items()
+        }
+        return new
+
+    def __reduce__(self):
+        return (CaseInsensitiveDict, (list(self._store.values()),))
 
     def __repr__(self):
-        return str(dict(self.items()))
+        return str(self.to_dict())
+
+
+def _parse_content_type_header(header: str) -> Tuple[str, Dict[str, Union[str, bool]]]:
+    '''
+    Origin: requests library (https://github.com/psf/requests)
+    Returns the content type and a dict of its parameters.
+    '''
+    tokens = header.split(';')
+    content_type, params = tokens[0].strip(), tokens[1:]
+    params_dict: Dict[str, Union[str, bool]] = {}
+    items_to_strip = "\"' "
+
+    for param in params:
+        param = param.strip()
+        if param:
+            key, value = param, True
+            index_of_equals = param.find('=')
+            if index_of_equals != -1:
+                key = param[:index_of_equals].strip(items_to_strip)
+                value = param[index_of_equals + 1 :].strip(items_to_strip)
+            params_dict[key.lower()] = value
+    return content_type, params_dict
+
+
+def get_encoding_from_headers(headers: Mapping) -> Optional[str]:
+    '''
+    Origin: requests library (https://github.com/psf/requests)
+    Returns encodings from given HTTP Header Dict.
+    '''
+    content_type = headers.get('content-type')
+    if not content_type:
+        return None
+
+    content_type, params = _parse_content_type_header(content_type)
+    if 'charset' in params:
+        return params['charset'].strip("'\"")
+    if 'text' in content_type:
+        return 'ISO-8859-1'
+    if 'application/json' in content_type:
+        # Assume UTF-8 based on RFC 4627: https://www.ietf.org/rfc/rfc4627.txt since the charset was unset
+        return 'utf-8'
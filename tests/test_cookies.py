@@ -0,0 +1,83 @@
+import pickle
+
+import pytest
+
+from botasaurus_requests.cookies import (
+    CompactCookie,
+    RequestsCookieJar,
+    extract_cookies_to_jar,
+    extract_response_cookies,
+)
+from botasaurus_requests.toolbelt import CaseInsensitiveDict
+
+ATTRIBUTES = (
+    'version',
+    'name',
+    'value',
+    'port',
+    'port_specified',
+    'domain',
+    'domain_specified',
+    'domain_initial_dot',
+    'path',
+    'path_specified',
+    'secure',
+    'expires',
+    'discard',
+    'comment',
+    'comment_url',
+    'rfc2109',
+)
+
+
+def cookie_tuples(jar):
+    return sorted(
+        tuple(getattr(cookie, key) for key in ATTRIBUTES) + (sorted(cookie._rest.items()),)
+        for cookie in jar
+    )
+
+
+@pytest.mark.parametrize(
+    'url, header',
+    [
+        ('https://example.com/a/b', 'a=1'),
+        ('https://example.com/a/b', 'a=1; Port="443"'),
+        ('https://example.com/a/b', 'a=1; Port="80,443"'),
+        ('https://example.com:8443/a/b', 'a=1; Port=8443'),
+        ('https://example.com:81/a/b', 'a=1; Port'),
+        ('https://example.com/a/b', 'a=1; Port=x'),
+        ('https://example.com/a/b', 'a=1; Version=1'),
+        ('https://example.com/a/b', 'a=1; Version="1"; Domain=example.com'),
+        ('https://example.com/a/b', 'a=1; Version=2'),
+        ('https://example.com/a/b', 'a=1; Version=x'),
+        ('https://example.com/a/b', 'a=1; Path=/a b'),
+        ('https://example.com/a b/c', 'a=1'),
+        ('https://example.com/a/b', 'a=1; Path=/%7e/x'),
+        ('https://example.com/a/b', 'a=1; path=/x; Path=/y'),
+        ('https://example.com/a/b', 'a=1; Domain'),
+        ('https://example.com/a/b', 'a=1; Domain=other.com'),
+        ('https://x.example.com/a/b', 'a=1; domain=Example.com; HttpOnly; SameSite=Lax; Secure'),
+        ('https://example.com/a/b', 'a=1; Max-Age=5; Expires=Wed, 21 Oct 2099 07:28:00 GMT'),
+        ('https://example.com/a/b', 'a=1; Expires=bogus'),
+        ('https://example.com/a/b', 'a="1"; Comment="hi"; CommentURL=x; Discard'),
+    ],
+)
+def test_parse_set_cookie_matches_cookiejar(url, header):
+    response_headers = {'Set-Cookie': [header]}
+    expected = extract_cookies_to_jar(url, CaseInsensitiveDict(), None, response_headers)
+    parsed = extract_response_cookies(url, CaseInsensitiveDict(), response_headers)
+    assert cookie_tuples(parsed) == cookie_tuples(expected)
+
+
+def test_domain_kept_as_given():
+    jar = RequestsCookieJar()
+    jar.set('Name', 'v', domain='Example.COM')
+    cookie = next(iter(jar))
+    assert isinstance(cookie, CompactCookie)
+    assert cookie.domain == 'Example.COM'
+    assert jar.get('Name', domain='Example.COM') == 'v'
+    assert jar['Name'] == 'v'
+    assert pickle.loads(pickle.dumps(jar)).get('Name', domain='Example.COM') == 'v'
+
+    jar.clear(domain='Example.COM')
+    assert len(jar) == 0
@@ -0,0 +1,24 @@
+import base64
+import json
+
+from botasaurus_requests import framing
+from botasaurus_requests.toolbelt import MultipartEncoder
+
+
+def test_multipart_body_streamed_in_json():
+    encoders = [
+        MultipartEncoder([('a', 'x' * size), ('f', ('f.bin', bytes(range(256)) * size))])
+        for size in (1, 1000)
+    ]
+    payloads = [
+        {'requestUrl': 'https://example.com/', 'requestBody': encoder} for encoder in encoders
+    ]
+    payloads.insert(1, {'requestUrl': 'https://example.com/', 'requestBody': 'plain'})
+    encoded = framing.encode_json(payloads)
+    assert isinstance(encoded, framing.Envelope)
+    data = b''.join(encoded)
+    assert len(encoded) == len(data)
+    bodies = [payload['requestBody'] for payload in json.loads(data)]
+    assert bodies[1] == 'plain'
+    assert base64.b64decode(bodies[0]) == encoders[0].to_bytes()
+    assert base64.b64decode(bodies[2]) == encoders[1].to_bytes()
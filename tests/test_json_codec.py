@@ -0,0 +1,18 @@
+import json
+
+import pytest
+
+from botasaurus_requests import json_codec
+
+
+@pytest.mark.parametrize(
+    'obj',
+    [
+        {'a': float('nan')},
+        [1.5, float('inf'), None],
+        {'a': [{'b': (float('-inf'),)}]},
+        {'a': None, 'b': 1.0},
+    ],
+)
+def test_dumps_matches_json(obj):
+    assert json_codec.dumps(obj) == json.dumps(obj, separators=(',', ':')).encode()
@@ -0,0 +1,41 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from botasaurus_requests import reqs
+
+
+class FakePool:
+    def __init__(self):
+        self.acquired = []
+        self.released = []
+
+    @staticmethod
+    def make_key(url, sess_kwargs):
+        return url, None
+
+    def acquire(self, key, factory):
+        session = object()
+        self.acquired.append(session)
+        return session
+
+    def release(self, key, session):
+        self.released.append(session)
+
+
+def test_cancelled_queued_request_releases_session(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(reqs, 'session_pool', pool)
+    executor = ThreadPoolExecutor(1)
+    blocker = threading.Event()
+    # keep the only worker busy, so the request stays queued
+    executor.submit(blocker.wait)
+    try:
+        request = reqs.LazyTLSRequest('GET', 'https://example.com/', executor=executor)
+        assert request.cancel()
+        assert request.session is None
+        assert pool.released == pool.acquired
+    finally:
+        blocker.set()
+        executor.shutdown(wait=True)
+    # the cancelled request is never sent, nor released twice
+    assert pool.released == pool.acquired
@@ -0,0 +1,88 @@
+import pytest
+
+from botasaurus_requests import Session, client, response
+from botasaurus_requests.exceptions import ClientException
+from botasaurus_requests.response import ProcessResponsePool, StreamBody
+
+
+class FakeSession:
+    def __init__(self, reply):
+        self.reply = reply
+
+    def build_request(self, method, url, cookies, **kwargs):
+        return {'requestUrl': url, 'proxyUrl': None}, {}
+
+    def send_payload(self, endpoint, payloads):
+        return self.reply
+
+    def build_response(self, url, headers, data, proxy):
+        return data
+
+
+class FakeProc:
+    def __init__(self, session, url):
+        self.session = session
+        self.method = 'GET'
+        self.url = url
+        self.cookies = None
+        self.kwargs = {}
+
+
+@pytest.mark.parametrize(
+    'reply',
+    [
+        [{'status': 200}],
+        {'body': 'bridge error'},
+        None,
+    ],
+)
+def test_execute_pool_fails_unanswered_requests(reply):
+    session = FakeSession(reply)
+    pool = ProcessResponsePool([FakeProc(session, f'https://example.com/{i}') for i in range(3)])
+    results = pool.execute_pool()
+    assert len(results) == 3
+    answered = len(reply) if isinstance(reply, list) else 0
+    assert results[:answered] == (reply[:answered] if answered else [])
+    for result in results[answered:]:
+        assert isinstance(result, ClientException)
+
+
+def test_stream_without_bridge_support(monkeypatch):
+    monkeypatch.setattr(client, 'supports_stream', lambda: False)
+    session = Session()
+    endpoints = []
+
+    def send_payload(endpoint, payload):
+        endpoints.append(endpoint)
+        return {
+            'isHistory': False,
+            'response': {
+                'target': 'https://example.com/',
+                'status': 200,
+                'headers': {},
+                'body': 'a\nb',
+                'isBase64': False,
+            },
+        }
+
+    monkeypatch.setattr(session, 'send_payload', send_payload)
+    resp = session.get('https://example.com/', headers={}, stream=True)
+    assert endpoints == ['/request']
+    assert isinstance(resp.raw, StreamBody)
+    assert list(resp.iter_lines()) == [b'a', b'b']
+
+
+def test_iter_pool_without_bridge_support(monkeypatch):
+    monkeypatch.setattr(response.bridge, 'supports_stream', lambda: False)
+    session = FakeSession([{'status': 200}, {'status': 404}])
+    endpoints = []
+    send_payload = session.send_payload
+
+    def record(endpoint, payloads):
+        endpoints.append(endpoint)
+        return send_payload(endpoint, payloads)
+
+    session.send_payload = record
+    pool = ProcessResponsePool([FakeProc(session, f'https://example.com/{i}') for i in range(2)])
+    assert list(pool.iter_pool()) == [(0, {'status': 200}), (1, {'status': 404})]
+    assert endpoints == ['/multirequest']